@@ -3,53 +3,34 @@
 Configuration settings for the proxy server.
 """
 
+import logging
+import os
 import sys
-from functools import lru_cache
+import threading
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Literal, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Final, Literal, Mapping, Optional
 
 from fnmatch import fnmatch
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+logger = logging.getLogger(__name__)
 
-def get_config_dir() -> Path:
-    """Get platform-specific config directory.
-
-    Returns:
-        Path to the config directory (~/.oa2a)
-    """
-    return Path.home() / ".oa2a"
-
-
-def get_config_file() -> Path:
-    """Get config file path.
-
-    Returns:
-        Path to the config file (~/.oa2a/config.toml)
-    """
-    return get_config_dir() / "config.toml"
-
-
-def create_default_config() -> bool:
-    """Create default config file if not exists.
-
-    Returns:
-        True if a new config file was created, False if it already exists
-    """
-    config_file = get_config_file()
-    if config_file.exists():
-        return False
-
-    config_dir = get_config_dir()
-    config_dir.mkdir(parents=True, exist_ok=True)
+# Parsed config files keyed by path: (st_mtime_ns, st_size, parsed data)
+_TOML_CACHE: dict[str, tuple[int, int, dict]] = {}
 
-    # Set restrictive permissions (0o600) for the config directory on Unix-like systems
-    if sys.platform != "win32":
-        config_dir.chmod(0o700)
+# Defaults offered by the setup wizard and used when writing its answers
+_INTERACTIVE_DEFAULTS: Final[dict[str, str]] = {
+    "openai_base_url": "https://api.openai.com/v1",
+    "host": "0.0.0.0",
+    "port": "8080",
+}
 
-    default_config = """# OA2A Configuration File
+# Default config file contents, encoded once at import time
+_DEFAULT_CONFIG_TOML: Final[bytes] = """# OA2A Configuration File
 # Place this file at ~/.oa2a/config.toml
 
 # OpenAI API Configuration
@@ -101,21 +82,74 @@ default_model = ""
 # [[model_mapping]]
 # from = "sonnet"
 # to = "kimi-k2.5"
-"""
-    config_file.write_text(default_config, encoding="utf-8")
+""".encode("utf-8")
+
+
+# Overrides the config directory for the current context (used by tests)
+_config_dir_override: ContextVar[Optional[Path]] = ContextVar(
+    "_config_dir_override", default=None
+)
+
+
+def get_config_dir() -> Path:
+    """Get platform-specific config directory.
+
+    Returns the context-local override if one is set, otherwise the home
+    directory location.
+
+    Returns:
+        Path to the config directory (~/.oa2a)
+    """
+    override = _config_dir_override.get()
+    if override is not None:
+        return override
+    return Path.home() / ".oa2a"
+
+
+def get_config_file() -> Path:
+    """Get config file path.
+
+    Returns:
+        Path to the config file (~/.oa2a/config.toml)
+    """
+    return get_config_dir() / "config.toml"
+
+
+def create_default_config() -> bool:
+    """Create default config file if not exists.
 
-    # Set restrictive permissions (0o600) for the config file on Unix-like systems
+    Returns:
+        True if a new config file was created, False if it already exists
+    """
+    config_file = get_config_file()
+    config_dir = config_file.parent
+    config_dir.mkdir(parents=True, exist_ok=True)
+
+    # Exclusive create: the kernel decides create-or-fail atomically, so
+    # there is no separate exists() check and no race with another writer
+    try:
+        with open(config_file, "xb") as f:
+            f.write(_DEFAULT_CONFIG_TOML)
+    except FileExistsError:
+        return False
+
+    # Set restrictive permissions for the config directory and file on Unix-like systems
     if sys.platform != "win32":
+        config_dir.chmod(0o700)
         config_file.chmod(0o600)
 
     return True
 
 
-def interactive_setup() -> dict:
+def interactive_setup(prompt_fn: Callable[[str], str] = input) -> dict:
     """Interactive configuration setup wizard.
 
     Guides user through setting up essential configuration values.
 
+    Args:
+        prompt_fn: Function that shows a prompt and returns the user's answer
+            (defaults to the built-in input)
+
     Returns:
         Dictionary containing user-provided configuration
     """
@@ -133,15 +167,15 @@ def interactive_setup() -> dict:
     print("[1/3] OpenAI API Configuration")
     print("-" * 40)
     while True:
-        api_key = input("Enter your OpenAI API Key (required): ").strip()
+        api_key = prompt_fn("Enter your OpenAI API Key (required): ").strip()
         if api_key:
             config["openai_api_key"] = api_key
             break
         print("API Key is required. Please enter a valid key.")
 
     # Base URL (optional, with default)
-    default_url = "https://api.openai.com/v1"
-    base_url = input(f"Enter OpenAI Base URL [{default_url}]: ").strip()
+    default_url = _INTERACTIVE_DEFAULTS["openai_base_url"]
+    base_url = prompt_fn(f"Enter OpenAI Base URL [{default_url}]: ").strip()
     config["openai_base_url"] = base_url if base_url else default_url
 
     print()
@@ -149,17 +183,19 @@ def interactive_setup() -> dict:
     print("-" * 40)
 
     # Host (with default)
-    default_host = "0.0.0.0"
-    host = input(f"Enter server host [{default_host}]: ").strip()
+    default_host = _INTERACTIVE_DEFAULTS["host"]
+    host = prompt_fn(f"Enter server host [{default_host}]: ").strip()
     config["host"] = host if host else default_host
 
     # Port (with default)
-    default_port = "8080"
-    port_input = input(f"Enter server port [{default_port}]: ").strip()
-    try:
-        config["port"] = int(port_input) if port_input else int(default_port)
-    except ValueError:
-        print(f"Invalid port number, using default: {default_port}")
+    default_port = _INTERACTIVE_DEFAULTS["port"]
+    port_input = prompt_fn(f"Enter server port [{default_port}]: ").strip()
+    # isdecimal() guarantees int() succeeds, so no exception path is needed
+    if port_input.isdecimal() and 1 <= int(port_input) <= 65535:
+        config["port"] = int(port_input)
+    else:
+        if port_input:
+            print(f"Invalid port number, using default: {default_port}")
         config["port"] = int(default_port)
 
     # API Key for server authentication (optional)
@@ -170,7 +206,7 @@ def interactive_setup() -> dict:
     print(
         "Leave empty to allow unauthenticated access (not recommended for production)."
     )
-    server_api_key = input("Enter server API key (optional): ").strip()
+    server_api_key = prompt_fn("Enter server API key (optional): ").strip()
     if server_api_key:
         config["api_key"] = server_api_key
 
@@ -199,7 +235,7 @@ def create_config_from_dict(config: dict) -> None:
     import tomli_w
 
     config_file = get_config_file()
-    config_dir = get_config_dir()
+    config_dir = config_file.parent
     config_dir.mkdir(parents=True, exist_ok=True)
 
     # Set restrictive permissions for the config directory on Unix-like systems
@@ -209,9 +245,11 @@ def create_config_from_dict(config: dict) -> None:
     # Build config dict with proper structure
     toml_config: dict = {
         "openai_api_key": config.get("openai_api_key", ""),
-        "openai_base_url": config.get("openai_base_url", "https://api.openai.com/v1"),
-        "host": config.get("host", "0.0.0.0"),
-        "port": config.get("port", 8080),
+        "openai_base_url": config.get(
+            "openai_base_url", _INTERACTIVE_DEFAULTS["openai_base_url"]
+        ),
+        "host": config.get("host", _INTERACTIVE_DEFAULTS["host"]),
+        "port": config.get("port", int(_INTERACTIVE_DEFAULTS["port"])),
         "request_timeout": config.get("request_timeout", 300.0),
         "cors_origins": ["*"],
         "cors_credentials": True,
@@ -255,10 +293,48 @@ def load_config_from_file() -> dict:
         import tomli as tomllib
 
     config_file = get_config_file()
-    if not config_file.exists():
+    try:
+        st = config_file.stat()
+    except FileNotFoundError:
         return {}
-    with open(config_file, "rb") as f:
-        return tomllib.load(f)
+
+    # Re-parse only when the file changed; callers get a shallow copy so
+    # they can update top-level keys without touching the cached dict
+    cache_key = str(config_file)
+    cached = _TOML_CACHE.get(cache_key)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return dict(cached[2])
+
+    data = tomllib.loads(_read_file_bytes(config_file, st.st_size).decode("utf-8"))
+    _TOML_CACHE[cache_key] = (st.st_mtime_ns, st.st_size, data)
+    return dict(data)
+
+
+def _read_file_bytes(path: Path, size_hint: int) -> bytes:
+    """Read a whole file with raw os.read calls, bypassing buffered IO.
+
+    Asking for one byte more than the expected size means a short read
+    proves EOF, so an unchanged file takes a single read syscall.
+
+    Args:
+        path: File to read
+        size_hint: Expected size in bytes (e.g. st_size from a prior stat)
+
+    Returns:
+        File contents
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        data = os.read(fd, size_hint + 1)
+        if len(data) <= size_hint:
+            return data
+        # File grew since it was stat'ed; read the rest
+        chunks = [data]
+        while chunk := os.read(fd, 65536):
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
 
 
 class ModelMappingRule(BaseSettings):
@@ -276,8 +352,12 @@ class Settings(BaseSettings):
     Environment variables are ignored - use the config file instead.
     """
 
+    # Frozen: settings are shared process-wide and derived values such as
+    # the auth headers are computed once, so fields must not change later.
+    # Use clone_with() to derive a modified copy.
     model_config = SettingsConfigDict(
         extra="ignore",
+        frozen=True,
     )
 
     # OpenAI API Configuration
@@ -295,10 +375,19 @@ class Settings(BaseSettings):
     api_key: Optional[str] = Field(default=None, description="API key for server authentication")
 
     # CORS settings
-    cors_origins: list[str] = Field(default=["*"], description="Allowed CORS origins")
+    # Tuples are immutable, so the defaults are shared instead of copied per
+    # instance. BaseSettings turns validate_default on, which would rebuild
+    # them, so it is switched off per field.
+    cors_origins: tuple[str, ...] = Field(
+        default=("*",), validate_default=False, description="Allowed CORS origins"
+    )
     cors_credentials: bool = Field(default=True, description="Allow CORS credentials")
-    cors_methods: list[str] = Field(default=["*"], description="Allowed CORS methods")
-    cors_headers: list[str] = Field(default=["*"], description="Allowed CORS headers")
+    cors_methods: tuple[str, ...] = Field(
+        default=("*",), validate_default=False, description="Allowed CORS methods"
+    )
+    cors_headers: tuple[str, ...] = Field(
+        default=("*",), validate_default=False, description="Allowed CORS headers"
+    )
 
     # Logging
     log_level: str = Field(default="INFO", description="Log level (DEBUG, INFO, WARNING, ERROR)")
@@ -328,9 +417,14 @@ class Settings(BaseSettings):
         description="List of model name mapping rules (from -> to, supports * wildcards)"
     )
 
-    @property
-    def openai_auth_headers(self) -> dict[str, str]:
-        """Get OpenAI authentication headers."""
+    # OpenAI auth headers, built once in model_post_init
+    _auth_headers: dict[str, str] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        """Precompute derived values once the fields are set."""
+        self._auth_headers = self._build_auth_headers()
+
+    def _build_auth_headers(self) -> dict[str, str]:
         headers = {
             "Authorization": f"Bearer {self.openai_api_key}",
         }
@@ -340,6 +434,28 @@ class Settings(BaseSettings):
             headers["OpenAI-Project"] = self.openai_project_id
         return headers
 
+    @property
+    def openai_auth_headers(self) -> Mapping[str, str]:
+        """Get OpenAI authentication headers.
+
+        Built once at construction and returned as a read-only view.
+        """
+        return MappingProxyType(self._auth_headers)
+
+    def clone_with(self, **overrides) -> "Settings":
+        """Return a validated copy with the given fields replaced.
+
+        Args:
+            **overrides: Field values to replace on the copy
+
+        Returns:
+            New Settings instance with all other field values kept
+
+        Raises:
+            ValidationError: If an override is not a valid field value
+        """
+        return self.model_validate({**self.model_dump(), **overrides})
+
     def resolve_model(self, model: str) -> str:
         """Resolve a model name using mapping rules.
 
@@ -397,8 +513,11 @@ def is_interactive() -> bool:
     return sys.stdin.isatty()
 
 
-@lru_cache
-def get_settings() -> Settings:
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings(notify: Optional[Callable[[str], None]] = None) -> Settings:
     """Get cached settings instance.
 
     Creates config file interactively if it doesn't exist and running in a TTY.
@@ -406,9 +525,44 @@ def get_settings() -> Settings:
 
     Configuration is read exclusively from ~/.oa2a/config.toml.
 
+    Args:
+        notify: Receives the notice shown when a default config file is
+            created (defaults to logging it at WARNING level). Only used by
+            the call that first loads the settings; ignored once they are
+            cached.
+
     Returns:
         Settings instance loaded from config file
     """
+    global _settings
+    settings = _settings
+    if settings is not None:
+        return settings
+    with _settings_lock:
+        if _settings is None:
+            _settings = _load_settings(notify or _notify_default_config)
+        return _settings
+
+
+def reset_settings() -> None:
+    """Drop the cached settings so the next get_settings() reloads them."""
+    global _settings
+    with _settings_lock:
+        _settings = None
+
+
+# get_settings used to be wrapped in lru_cache; keep its cache_clear() working
+get_settings.cache_clear = reset_settings  # type: ignore[attr-defined]
+
+
+def _notify_default_config(message: str) -> None:
+    # Logged at WARNING so the notice still reaches stderr before logging
+    # is configured (via the logging module's last resort handler)
+    logger.warning(message)
+
+
+def _load_settings(notify: Callable[[str], None]) -> Settings:
+    """Load settings, creating the config file on first run."""
     config_file = get_config_file()
     if not config_file.exists():
         if is_interactive():
@@ -420,6 +574,8 @@ def get_settings() -> Settings:
         else:
             # Non-interactive environment: create default config
             create_default_config()
-            print(f"Created default config file: {config_file}")
-            print("Please edit it to add your API keys and settings.")
+            notify(
+                f"Created default config file: {config_file}. "
+                "Please edit it to add your API keys and settings."
+            )
     return Settings.from_config()
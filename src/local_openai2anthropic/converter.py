@@ -5,15 +5,10 @@ Core conversion logic between Anthropic and OpenAI formats.
 
 import json
 import logging
-from typing import Any, Optional
-
-from anthropic.types import (
-    ContentBlock,
-    Message,
-    MessageParam,
-    TextBlock,
-    ToolUseBlock,
-)
+import re
+from typing import Any, Final, Optional
+
+from anthropic.types import Message, MessageParam
 from anthropic.types.message_create_params import MessageCreateParams
 from openai.types.chat import (
     ChatCompletion,
@@ -23,13 +18,57 @@ from openai.types.chat.completion_create_params import CompletionCreateParams
 
 from local_openai2anthropic.protocol import UsageWithCache
 
+try:
+    import orjson
+except ImportError:  # optional speedup, the stdlib parser is the fallback
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Parser for upstream tool_call arguments. orjson.JSONDecodeError subclasses
+# json.JSONDecodeError, so callers catch the same exception either way.
+# Serialization stays on json.dumps: its output is what chat templates render
+# into the prompt, and it must not change with the installed extras.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 # Pattern to match Claude Code billing header in system prompts
 # Format: x-anthropic-billing-header:cc version=...;cc_entrypoint=...;cch=...;
 # The cch value changes on each request, breaking cache hits
 CLAUDE_BILLING_HEADER_PATTERN = "x-anthropic-billing-header"
+# Match the entire billing header starting from "x-anthropic-billing-header:"
+# up to the semicolon that follows "cch=..." (the last parameter). Compiled
+# once so the hot path skips the re module's pattern cache lookup. The prefix
+# is case-sensitive (Claude Code emits it lowercase) so sre can use its fast
+# literal-prefix search; a global IGNORECASE would force a per-position scan,
+# roughly 9x slower on a 100 KB prompt. Only the parameters ignore case.
+_BILLING_RE = re.compile(r"x-anthropic-billing-header:(?i:.*?cch=[a-zA-Z0-9]+;?)")
+_BLANK_LINES_RE = re.compile(r"\n\n+")
 ANTHROPIC_EFFORT_LEVELS = {"low", "medium", "high", "xhigh", "max"}
+# Shared by every streaming request. Callers only ever pop the key, never mutate
+# the value, and it must stay a real dict so the request body JSON-encodes.
+_STREAM_OPTIONS_INCLUDE_USAGE: Final[dict[str, bool]] = {"include_usage": True}
+# OpenAI finish_reason -> Anthropic stop_reason; anything unknown is end_turn.
+_STOP_REASON_MAP: Final[dict[Optional[str], str]] = {
+    "stop": "end_turn",
+    "length": "max_tokens",
+    "tool_calls": "tool_use",
+    "content_filter": "end_turn",
+    None: "end_turn",
+}
+# Stands in for image blocks inside tool_result content, which OpenAI tool
+# messages cannot carry.
+_TOOL_RESULT_IMAGE_PLACEHOLDER: Final = "[Image content]"
+# chat_template_kwargs shared by requests that need no reasoning_effort; a
+# request that sets one gets its own copy instead of mutating these.
+_THINKING_ON_KWARGS: Final[dict[str, Any]] = {
+    "thinking": True,
+    "enable_thinking": True,
+    "preserve_thinking": True,
+}
+_THINKING_OFF_KWARGS: Final[dict[str, Any]] = {
+    "thinking": False,
+    "enable_thinking": False,
+}
 
 
 def _strip_claude_billing_header(text: str) -> str:
@@ -41,33 +80,15 @@ def _strip_claude_billing_header(text: str) -> str:
     The 'cch' value changes on each request, which breaks upstream API caching.
     We remove this header to restore cache hit rates.
     """
-    if not text:
+    # Plain substring search first: most prompts carry no header, and Claude
+    # Code always emits it in lowercase, so skip lower() and the regex VM.
+    if not text or CLAUDE_BILLING_HEADER_PATTERN not in text:
         return text
 
-    # Check if the billing header is present
-    if CLAUDE_BILLING_HEADER_PATTERN not in text.lower():
-        return text
-
-    # Use regex to remove the billing header
-    # The billing header format is:
-    # x-anthropic-billing-header:cc version=X.X.X;cc_entrypoint=XXX;cch=XXXX;
-    # It always starts with "x-anthropic-billing-header:" and ends with a semicolon
-    import re
-
-    # Match the entire billing header starting from "x-anthropic-billing-header:"
-    # The header ends with the last semicolon before a newline or end of string
-    # We need to match everything from "x-anthropic-billing-header:" to the semicolon
-    # that follows "cch=..." (the last parameter)
-    #
-    # The pattern is:
-    # - Start with "x-anthropic-billing-header:"
-    # - Match everything until we find "cch=..." followed by a semicolon
-    pattern = r"x-anthropic-billing-header:.*?cch=[a-zA-Z0-9]+;?"
-
-    result = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    result = _BILLING_RE.sub("", text)
 
     # Clean up any double newlines or leading/trailing whitespace
-    result = re.sub(r"\n\n+", "\n", result)
+    result = _BLANK_LINES_RE.sub("\n", result)
     result = result.strip()
 
     logger.debug(
@@ -196,12 +217,19 @@ def convert_anthropic_to_openai(
     output_config = anthropic_params.get("output_config")
     # metadata is accepted but not forwarded to OpenAI
 
+    # Normalize tool definitions to dicts once; SDK models would otherwise be
+    # dumped again for every server tool class and for the conversion below.
+    tool_defs = (
+        [tool if isinstance(tool, dict) else tool.model_dump() for tool in tools]
+        if tools
+        else []
+    )
+
     # Extract server tool configurations using registry
     server_tools_config: dict[str, dict[str, Any]] = {}
-    if enabled_server_tools and tools:
+    if enabled_server_tools and tool_defs:
         for tool_class in enabled_server_tools:
-            for tool in tools:
-                tool_def = tool if isinstance(tool, dict) else tool.model_dump()
+            for tool_def in tool_defs:
                 config = tool_class.extract_config(tool_def)
                 if config is not None:
                     server_tools_config[tool_class.tool_type] = config
@@ -219,10 +247,11 @@ def convert_anthropic_to_openai(
                 openai_messages.append({"role": "system", "content": cleaned_system})
         else:
             # Handle list of system blocks
-            system_text = ""
-            for block in system:
-                if isinstance(block, dict) and block.get("type") == "text":
-                    system_text += block.get("text", "")
+            system_text = "".join(
+                block.get("text", "")
+                for block in system
+                if isinstance(block, dict) and block.get("type") == "text"
+            )
             if system_text:
                 # Strip Claude billing header from the combined system text
                 cleaned_system = _strip_claude_billing_header(system_text)
@@ -263,7 +292,7 @@ def convert_anthropic_to_openai(
 
     # Always include usage in stream for accurate token counting
     if stream:
-        params["stream_options"] = {"include_usage": True}
+        params["stream_options"] = _STREAM_OPTIONS_INCLUDE_USAGE
 
     if stop_sequences:
         params["stop"] = stop_sequences
@@ -275,12 +304,11 @@ def convert_anthropic_to_openai(
         params["top_k"] = top_k
 
     # Convert tools
-    if tools:
+    if tool_defs:
         openai_tools: list[ChatCompletionToolParam] = []
         server_tool_types = set(server_tools_config.keys())
 
-        for tool in tools:
-            tool_def = tool if isinstance(tool, dict) else tool.model_dump()
+        for tool_def in tool_defs:
             tool_type = tool_def.get("type")
 
             # Skip server tools - they are handled separately
@@ -336,14 +364,12 @@ def convert_anthropic_to_openai(
         thinking_type = thinking.get("type")
         if thinking_type == "enabled":
             # Enable thinking mode - include both variants for compatibility
-            params["chat_template_kwargs"] = {
-                "thinking": True,
-                "enable_thinking": True,
-                "preserve_thinking": True,
-            }
             reasoning_effort = _resolve_reasoning_effort(model, thinking, output_config)
-            if reasoning_effort:
-                params["chat_template_kwargs"]["reasoning_effort"] = reasoning_effort
+            params["chat_template_kwargs"] = (
+                {**_THINKING_ON_KWARGS, "reasoning_effort": reasoning_effort}
+                if reasoning_effort
+                else _THINKING_ON_KWARGS
+            )
 
             budget_tokens = thinking.get("budget_tokens")
             if budget_tokens is not None and not reasoning_effort:
@@ -354,26 +380,18 @@ def convert_anthropic_to_openai(
                 )
         elif thinking_type == "adaptive":
             # Adaptive thinking mode - let the model decide
-            params["chat_template_kwargs"] = {
-                "thinking": True,
-                "enable_thinking": True,
-                "preserve_thinking": True,
-            }
             reasoning_effort = _resolve_reasoning_effort(model, thinking, output_config)
-            if reasoning_effort:
-                params["chat_template_kwargs"]["reasoning_effort"] = reasoning_effort
+            params["chat_template_kwargs"] = (
+                {**_THINKING_ON_KWARGS, "reasoning_effort": reasoning_effort}
+                if reasoning_effort
+                else _THINKING_ON_KWARGS
+            )
         else:
             # Default to disabled thinking mode if not explicitly enabled
-            params["chat_template_kwargs"] = {
-                "thinking": False,
-                "enable_thinking": False,
-            }
+            params["chat_template_kwargs"] = _THINKING_OFF_KWARGS
     else:
         # Default to disabled thinking mode when thinking is not provided
-        params["chat_template_kwargs"] = {
-            "thinking": False,
-            "enable_thinking": False,
-        }
+        params["chat_template_kwargs"] = _THINKING_OFF_KWARGS
 
 
     # Store server tool configs for later use by router
@@ -410,15 +428,18 @@ def _convert_anthropic_message_to_openai(
             openai_content.append({"type": "text", "text": block})
             continue
 
-        block_type = block.get("type") if isinstance(block, dict) else block.type
+        # Blocks are either plain dicts or SDK models; check which once per
+        # block rather than again in every branch below.
+        is_dict = isinstance(block, dict)
+        block_type = block.get("type") if is_dict else block.type
 
         if block_type == "text":
-            text = block.get("text") if isinstance(block, dict) else block.text
+            text = block.get("text") if is_dict else block.text
             openai_content.append({"type": "text", "text": text})
 
         elif block_type == "thinking":
             # Extract thinking content for reasoning_content field
-            if isinstance(block, dict):
+            if is_dict:
                 thinking_text = block.get("thinking", "")
             else:
                 # Handle ThinkingBlock object
@@ -428,7 +449,7 @@ def _convert_anthropic_message_to_openai(
 
         elif block_type == "image":
             # Convert image to image_url format
-            source = block.get("source") if isinstance(block, dict) else block.source
+            source = block.get("source") if is_dict else block.source
             if source:
                 if isinstance(source, dict):
                     media_type = source.get("media_type", "image/jpeg")
@@ -436,18 +457,16 @@ def _convert_anthropic_message_to_openai(
                 else:
                     media_type = source.media_type
                     data = source.data
-                # Build data URL
-                url = f"data:{media_type};base64,{data}"
                 openai_content.append(
                     {
                         "type": "image_url",
-                        "image_url": {"url": url},
+                        "image_url": {"url": f"data:{media_type};base64,{data}"},
                     }
                 )
 
         elif block_type == "tool_use":
             # Convert to function call
-            if isinstance(block, dict):
+            if is_dict:
                 tool_id = block.get("id", "")
                 name = block.get("name", "")
                 input_data = block.get("input", {})
@@ -471,7 +490,7 @@ def _convert_anthropic_message_to_openai(
 
         elif block_type == "tool_result":
             # Tool results need to be separate tool messages
-            if isinstance(block, dict):
+            if is_dict:
                 tool_use_id = block.get("tool_use_id", "")
                 result_content = block.get("content", "")
                 # Note: is_error is not directly supported in OpenAI API
@@ -490,7 +509,7 @@ def _convert_anthropic_message_to_openai(
                             text_parts.append(item.get("text", ""))
                         elif item.get("type") == "image":
                             # Images in tool results - convert to text representation
-                            text_parts.append("[Image content]")
+                            text_parts.append(_TOOL_RESULT_IMAGE_PLACEHOLDER)
                     else:
                         text_parts.append(str(item))
                 result_text = "\n".join(text_parts)
@@ -618,8 +637,12 @@ def _build_usage_with_cache(
     cache_creation_input_tokens: Optional[int] = None,
     cache_read_input_tokens: Optional[int] = None,
 ) -> UsageWithCache:
-    """Build usage object with optional cache token counts."""
-    return UsageWithCache(
+    """Build usage object with optional cache token counts.
+
+    The counts are ints taken from an already-validated upstream response, so
+    validation is skipped.
+    """
+    return UsageWithCache.model_construct(
         input_tokens=prompt_tokens,
         output_tokens=completion_tokens,
         cache_creation_input_tokens=cache_creation_input_tokens,
@@ -641,34 +664,34 @@ def convert_openai_to_anthropic(
     Returns:
         Anthropic Message response
     """
-    from anthropic.types.beta import BetaThinkingBlock
-
     choice = completion.choices[0]
     message = choice.message
 
-    # Convert content blocks
-    content: list[ContentBlock] = []
+    # Convert content blocks. They are built as plain dicts, which is what
+    # Message.model_validate consumes, rather than as SDK block models that
+    # would only be dumped back to dicts.
+    content: list[dict[str, Any]] = []
 
     # Add reasoning content (thinking) first if present
     # vLLM uses "reasoning", SGLang uses "reasoning_content" — support both
     reasoning_content: str | None = getattr(message, "reasoning", None) or getattr(message, "reasoning_content", None)
     if reasoning_content:
         content.append(
-            BetaThinkingBlock(
-                type="thinking",
-                thinking=reasoning_content,
-                signature="",  # Signature not available from OpenAI format
-            )
+            {
+                "type": "thinking",
+                "thinking": reasoning_content,
+                "signature": "",  # Signature not available from OpenAI format
+            }
         )
 
     # Add text content if present
     if message.content:
         if isinstance(message.content, str):
-            content.append(TextBlock(type="text", text=message.content))
+            content.append({"type": "text", "text": message.content})
         else:
             for part in message.content:
                 if part.type == "text":
-                    content.append(TextBlock(type="text", text=part.text))
+                    content.append({"type": "text", "text": part.text})
 
     # Convert tool calls
     if message.tool_calls:
@@ -679,29 +702,21 @@ def convert_openai_to_anthropic(
 
             tool_input: dict[str, Any] = {}
             try:
-                tool_input = json.loads(tc.function.arguments)
+                tool_input = _json_loads(tc.function.arguments)
             except json.JSONDecodeError:
                 tool_input = {"raw": tc.function.arguments}
 
             content.append(
-                ToolUseBlock(
-                    type="tool_use",
-                    id=tc.id,
-                    name=tc.function.name,
-                    input=tool_input,
-                )
+                {
+                    "type": "tool_use",
+                    "id": tc.id,
+                    "name": tc.function.name,
+                    "input": tool_input,
+                }
             )
 
     # Determine stop reason
-    stop_reason_map = {
-        "stop": "end_turn",
-        "length": "max_tokens",
-        "tool_calls": "tool_use",
-        "content_filter": "end_turn",
-    }
-    anthropic_stop_reason = stop_reason_map.get(
-        choice.finish_reason or "stop", "end_turn"
-    )
+    anthropic_stop_reason = _STOP_REASON_MAP.get(choice.finish_reason, "end_turn")
 
     # Build usage dict with cache support (if available from upstream)
     usage_dict = None
@@ -722,7 +737,7 @@ def convert_openai_to_anthropic(
         "id": completion.id,
         "type": "message",
         "role": "assistant",
-        "content": [block.model_dump() for block in content],
+        "content": content,
         "model": model,
         "stop_reason": anthropic_stop_reason,
         "stop_sequence": None,
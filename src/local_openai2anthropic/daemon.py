@@ -3,15 +3,24 @@
 Daemon process management for local-openai2anthropic server.
 """
 
+import errno
 import json
 import os
+import select
+import selectors
 import signal
 import socket
 import subprocess
 import sys
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speedup, the stdlib codec is the fallback
+    orjson = None
 
 # Constants
 DATA_DIR = Path.home() / ".local" / "share" / "oa2a"
@@ -19,32 +28,101 @@ PID_FILE = DATA_DIR / "oa2a.pid"
 CONFIG_FILE = DATA_DIR / "oa2a.json"
 LOG_FILE = DATA_DIR / "oa2a.log"
 
+# Chunk size for scanning the log backwards
+_TAIL_BLOCK_SIZE = 64 * 1024
+
+# errno values meaning the address is already bound (Windows reports WSAEADDRINUSE)
+_ADDR_IN_USE_ERRNOS = frozenset(
+    {errno.EADDRINUSE, getattr(errno, "WSAEADDRINUSE", errno.EADDRINUSE)}
+)
+
+# Codec for the daemon config file. orjson.JSONDecodeError subclasses
+# json.JSONDecodeError, so the loader catches the same exception either way.
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _json_loads = json.loads
+
+# Set once DATA_DIR has been created in this process
+_dirs_ensured = False
+
+# connect_ex results meaning a non-blocking connect is still in progress
+_CONNECT_PENDING_ERRNOS = frozenset(
+    {
+        errno.EINPROGRESS,
+        errno.EWOULDBLOCK,
+        getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK),
+    }
+)
+
+# Parsed daemon config per path, as (st_mtime_ns, st_size, config)
+_config_cache: dict[Path, tuple[int, int, dict]] = {}
+
 
 def _ensure_dirs() -> None:
     """Ensure pid/log directories exist."""
+    global _dirs_ensured
+    if _dirs_ensured:
+        return
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    _dirs_ensured = True
 
 
 def _read_pid() -> Optional[int]:
     """Read PID from pidfile."""
     try:
-        if PID_FILE.exists():
-            return int(PID_FILE.read_text().strip())
+        return int(PID_FILE.read_text().strip())
     except (ValueError, OSError):
-        pass
-    return None
+        return None
 
 
 def _remove_pid() -> None:
     """Remove pidfile."""
     try:
-        if PID_FILE.exists():
-            PID_FILE.unlink()
+        PID_FILE.unlink(missing_ok=True)
     except OSError:
         pass
 
 
-def _save_daemon_config(host: str, port: int) -> None:
+def _fsync_path(path: Path) -> None:
+    """Flush a file or directory to disk, ignoring platforms that can't."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # e.g. directories on Windows
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Replace a file's contents atomically and durably.
+
+    Writes to a temporary sibling, fsyncs it, renames it over ``path`` and
+    fsyncs the directory.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_path(path.parent)
+
+
+def _save_daemon_config(host: str, port: int, pid: Optional[int] = None) -> None:
     """Save daemon configuration to file."""
     _ensure_dirs()
     config = {
@@ -52,46 +130,133 @@ def _save_daemon_config(host: str, port: int) -> None:
         "port": port,
         "started_at": time.time(),
     }
+    if pid is not None:
+        # Record the kernel start time so a recycled PID can be told apart
+        config["pid"] = pid
+        config["start_time"] = _get_process_start_time(pid)
+    _config_cache.pop(CONFIG_FILE, None)
     try:
-        CONFIG_FILE.write_text(json.dumps(config))
+        _write_atomic(CONFIG_FILE, _json_dumps(config))
     except OSError:
         pass
 
 
 def _load_daemon_config() -> Optional[dict]:
-    """Load daemon configuration from file."""
+    """
+    Load daemon configuration from file.
+
+    The parsed config is cached and only re-read when the file's mtime or
+    size changes, so repeated status checks cost a single stat call.
+    """
     try:
-        if CONFIG_FILE.exists():
-            return json.loads(CONFIG_FILE.read_text())
+        st = CONFIG_FILE.stat()
+        cached = _config_cache.get(CONFIG_FILE)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            # Copy so callers can't modify the cached config
+            return dict(cached[2])
+        config = _json_loads(CONFIG_FILE.read_bytes())
     except (OSError, json.JSONDecodeError):
-        pass
-    return None
+        return None
+    _config_cache[CONFIG_FILE] = (st.st_mtime_ns, st.st_size, config)
+    return dict(config)
 
 
 def _remove_daemon_config() -> None:
     """Remove daemon configuration file."""
+    _config_cache.pop(CONFIG_FILE, None)
     try:
-        if CONFIG_FILE.exists():
-            CONFIG_FILE.unlink()
+        CONFIG_FILE.unlink(missing_ok=True)
     except OSError:
         pass
 
 
-def _is_process_running(pid: int) -> bool:
-    """Check if a process with given PID is running."""
+def _get_process_start_time(pid: int) -> Optional[int]:
+    """Read a process's start time (in clock ticks since boot) from /proc."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        # starttime is field 22; skip past "pid (comm) " since comm may contain spaces
+        return int(stat.rsplit(b")", 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _stored_start_time(pid: int, config: Optional[dict]) -> Optional[int]:
+    """Return the start time saved for ``pid`` in the daemon config, if any."""
+    if config and config.get("pid") == pid:
+        return config.get("start_time")
+    return None
+
+
+def _is_process_running(pid: int, start_time: Optional[int] = None) -> bool:
+    """
+    Check if a process with given PID is running.
+
+    If ``start_time`` is given, a live process that started at a different
+    time is an unrelated process that reused the PID, and counts as not
+    running.
+    """
     try:
         os.kill(pid, 0)
-        return True
     except (OSError, ProcessLookupError):
         return False
 
+    if start_time is not None:
+        current = _get_process_start_time(pid)
+        if current is not None and current != start_time:
+            return False
+    return True
 
-def _read_port() -> Optional[int]:
-    """Read port from daemon config file."""
-    config = _load_daemon_config()
-    if config and "port" in config:
-        return config["port"]
-    return None
+
+def _wait_for_exit(pid: int, timeout: float, start_time: Optional[int] = None) -> bool:
+    """
+    Wait up to ``timeout`` seconds for a process to exit.
+
+    Blocks on a pidfd (Linux >= 5.3) or a kqueue NOTE_EXIT filter (macOS/BSD)
+    so the wait ends as soon as the process exits, and falls back to polling
+    ``_is_process_running`` elsewhere.
+
+    Returns:
+        True if the process exited, False if it is still running
+    """
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if pidfd_open is not None:
+        try:
+            pidfd = pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # e.g. ENOSYS on older kernels, fall back to polling
+        else:
+            try:
+                poller = select.poll()
+                poller.register(pidfd, select.POLLIN)
+                return bool(poller.poll(timeout * 1000))
+            finally:
+                os.close(pidfd)
+    elif hasattr(select, "kqueue"):
+        kq = select.kqueue()
+        try:
+            event = select.kevent(
+                pid,
+                filter=select.KQ_FILTER_PROC,
+                flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                fflags=select.KQ_NOTE_EXIT,
+            )
+            return bool(kq.control([event], 1, timeout))
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass
+        finally:
+            kq.close()
+
+    deadline = time.monotonic() + timeout
+    while _is_process_running(pid, start_time):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+    return True
 
 
 def _find_pid_by_port(port: int) -> Optional[int]:
@@ -111,8 +276,29 @@ def _find_pid_by_port(port: int) -> Optional[int]:
 
 
 def _is_port_in_use(port: int, host: str = "0.0.0.0") -> bool:
-    """Check if a port is already in use."""
+    """
+    Check if a port is already in use.
+
+    Probes with bind() first, which is answered locally without a network
+    round trip, and falls back to connecting when the bind fails for another
+    reason (e.g. a non-local host or a privileged port). Outside Linux a
+    successful bind is confirmed by connecting too, since BSD/macOS let a
+    wildcard SO_REUSEADDR bind coexist with a listener on a specific address.
+    """
     try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            if sys.platform != "win32":
+                # Bind like uvicorn does so TIME_WAIT sockets don't count as in use
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                s.bind((host, port))
+            except OSError as e:
+                if e.errno in _ADDR_IN_USE_ERRNOS:
+                    return True
+            else:
+                if sys.platform.startswith("linux"):
+                    return False
+
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(1)
             result = s.connect_ex((host, port))
@@ -121,10 +307,48 @@ def _is_port_in_use(port: int, host: str = "0.0.0.0") -> bool:
         return False
 
 
+def _wait_for_port(
+    port: int, host: str, timeout: float, process: subprocess.Popen
+) -> bool:
+    """
+    Wait until ``host:port`` accepts connections.
+
+    Each attempt is a non-blocking connect whose completion is awaited on a
+    selector. Refused attempts are retried after a short pause until the
+    timeout expires or ``process`` exits.
+
+    Returns:
+        True once a connection succeeds, False on timeout or process exit
+    """
+    deadline = time.monotonic() + timeout
+    with selectors.DefaultSelector() as sel:
+        while True:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.setblocking(False)
+                err = s.connect_ex((host, port))
+                if err in _CONNECT_PENDING_ERRNOS:
+                    sel.register(s, selectors.EVENT_WRITE)
+                    try:
+                        ready = sel.select(max(0.0, deadline - time.monotonic()))
+                    finally:
+                        sel.unregister(s)
+                    if ready:
+                        err = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    else:
+                        err = errno.ETIMEDOUT
+                if err == 0:
+                    return True
+            if process.poll() is not None or time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
 def _cleanup_stale_pidfile() -> None:
     """Remove pidfile if the process is not running."""
     pid = _read_pid()
-    if pid is not None and not _is_process_running(pid):
+    if pid is not None and not _is_process_running(
+        pid, _stored_start_time(pid, _load_daemon_config())
+    ):
         _remove_pid()
         _remove_daemon_config()
 
@@ -136,12 +360,17 @@ def get_status() -> tuple[bool, Optional[int], Optional[dict]]:
     Returns:
         Tuple of (is_running, pid, config)
     """
-    _cleanup_stale_pidfile()
+    # Same as _cleanup_stale_pidfile() followed by _read_pid(), but reads
+    # the pidfile and checks liveness only once
     pid = _read_pid()
+    if pid is None:
+        return False, None, None
     config = _load_daemon_config()
-    if pid is not None and _is_process_running(pid):
-        return True, pid, config
-    return False, None, None
+    if not _is_process_running(pid, _stored_start_time(pid, config)):
+        _remove_pid()
+        _remove_daemon_config()
+        return False, None, None
+    return True, pid, config
 
 
 def start_daemon(
@@ -219,31 +448,14 @@ def start_daemon(
         # Don't wait - close file descriptor in parent but child keeps it open
         log_fd.close()
 
-        # Give the process a moment to fail (e.g., port in use)
-        time.sleep(0.5)
-
-        # Check if process is still running
-        if process.poll() is not None:
-            # Process exited immediately
-            print("Failed to start server - check logs with 'oa2a logs'", file=sys.stderr)
-            return False
-
-        # Wait a bit more for the server to actually start
-        time.sleep(0.5)
-
-        # Check if port is now in use (server started successfully)
-        for _ in range(10):
-            if _is_port_in_use(port, "127.0.0.1"):
-                break
-            time.sleep(0.2)
-        else:
-            # Port never became active, check if process died
+        # Wait for the server to accept connections (or the process to die)
+        if not _wait_for_port(port, "127.0.0.1", 3.0, process):
             if process.poll() is not None:
-                print("Server process exited unexpectedly - check logs", file=sys.stderr)
+                print("Failed to start server - check logs with 'oa2a logs'", file=sys.stderr)
                 return False
 
         # Save the configuration
-        _save_daemon_config(host, port)
+        _save_daemon_config(host, port, process.pid)
 
         print(f"Server started (PID: {process.pid})")
         print(f"Listening on {host}:{port}")
@@ -269,15 +481,22 @@ def stop_daemon(force: bool = False) -> bool:
     _cleanup_stale_pidfile()
 
     pid = _read_pid()
-    port = _read_port()
+    config = _load_daemon_config()
+    port = config.get("port") if config else None
+    start_time = _stored_start_time(pid, config) if pid is not None else None
 
     # If pid file process not running but port still in use, find and kill the process
-    if pid is not None and not _is_process_running(pid) and port is not None:
+    if (
+        pid is not None
+        and not _is_process_running(pid, start_time)
+        and port is not None
+    ):
         if _is_port_in_use(port):
             print(f"Process with PID {pid} not found but port {port} is in use, searching...")
             found_pid = _find_pid_by_port(port)
             if found_pid is not None:
                 pid = found_pid
+                start_time = None
                 print(f"Found process on port {port}: PID {pid}")
             else:
                 # Port is in use by another process, clear the pidfile
@@ -294,19 +513,14 @@ def stop_daemon(force: bool = False) -> bool:
         signal_num = signal.SIGKILL if force else signal.SIGTERM
         os.kill(pid, signal_num)
 
-        # Wait for process to terminate
-        for _ in range(50):  # Wait up to 5 seconds
-            if not _is_process_running(pid):
-                break
-            time.sleep(0.1)
-
-        if _is_process_running(pid):
+        # Wait up to 5 seconds for process to terminate
+        if not _wait_for_exit(pid, 5.0, start_time):
             if not force:
                 print(f"Server did not stop gracefully, use -f to force kill", file=sys.stderr)
                 return False
             # Force kill
             os.kill(pid, signal.SIGKILL)
-            time.sleep(0.2)
+            _wait_for_exit(pid, 0.2, start_time)
 
         _remove_pid()
         _remove_daemon_config()
@@ -340,13 +554,111 @@ def restart_daemon(
         True if restarted successfully, False otherwise
     """
     print("Restarting server...")
-    # Use force=True to ensure the old process is killed even if it's stuck
-    stop_daemon(force=True)
-    # Longer delay to ensure port is fully released
-    time.sleep(1)
+    # Use force=True to ensure the old process is killed even if it's stuck.
+    # stop_daemon returns once it has exited, and the new server binds with
+    # SO_REUSEADDR, so lingering TIME_WAIT sockets don't block the start.
+    if not stop_daemon(force=True):
+        return False
     return start_daemon(host, port, log_level)
 
 
+def _tail_offset(f: BinaryIO, lines: int) -> int:
+    """Return the offset where the last ``lines`` lines of ``f`` start."""
+    end = f.seek(0, os.SEEK_END)
+    if lines <= 0:
+        return end
+    pos = end
+    remaining = lines
+    while pos > 0:
+        size = min(_TAIL_BLOCK_SIZE, pos)
+        pos -= size
+        f.seek(pos)
+        block = f.read(size)
+        if pos + size == end and block.endswith(b"\n"):
+            # A trailing newline ends the last line rather than starting a new one
+            block = block[:-1]
+        idx = len(block)
+        while (idx := block.rfind(b"\n", 0, idx)) >= 0:
+            remaining -= 1
+            if remaining == 0:
+                return pos + idx + 1
+    return 0
+
+
+@contextmanager
+def _watch_for_writes(path: Path) -> Iterator[Callable[[], None]]:
+    """
+    Watch a file for appends.
+
+    Yields a function that blocks until the file may have grown, been
+    truncated or been replaced. Uses a kqueue vnode filter on macOS/BSD and
+    falls back to a short sleep elsewhere.
+    """
+    if hasattr(select, "kqueue"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            kq = select.kqueue()
+            try:
+                event = select.kevent(
+                    fd,
+                    filter=select.KQ_FILTER_VNODE,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                    fflags=(
+                        select.KQ_NOTE_WRITE
+                        | select.KQ_NOTE_EXTEND
+                        | select.KQ_NOTE_DELETE
+                        | select.KQ_NOTE_RENAME
+                    ),
+                )
+                kq.control([event], 0)
+                # Time out so a replacement file is noticed after a rotation
+                yield lambda: kq.control(None, 1, 1.0)
+                return
+            finally:
+                kq.close()
+        finally:
+            os.close(fd)
+
+    yield lambda: time.sleep(0.2)
+
+
+def _tail_follow(path: Path, lines: int) -> None:
+    """
+    Print the last ``lines`` lines of a file, then stream appended data.
+
+    Like ``tail -F``, starts again from the top when the file is truncated
+    or replaced by a new one.
+    """
+    out = sys.stdout.buffer
+    f = open(path, "rb")
+    try:
+        f.seek(_tail_offset(f, lines))
+        while True:
+            with _watch_for_writes(path) as wait:
+                while True:
+                    data = f.read()
+                    if data:
+                        out.write(data)
+                        out.flush()
+                        continue
+                    st = os.fstat(f.fileno())
+                    if st.st_size < f.tell():
+                        print("oa2a: log file truncated", file=sys.stderr)
+                        f.seek(0)
+                        continue
+                    try:
+                        current = os.stat(path)
+                    except FileNotFoundError:
+                        current = st  # rotated away, wait for the new file
+                    if (current.st_dev, current.st_ino) != (st.st_dev, st.st_ino):
+                        break
+                    wait()
+            f.close()
+            f = open(path, "rb")
+    finally:
+        f.close()
+
+
 def show_logs(follow: bool = False, lines: int = 50) -> bool:
     """
     Show server logs.
@@ -358,30 +670,23 @@ def show_logs(follow: bool = False, lines: int = 50) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    if not LOG_FILE.exists():
-        print("No log file found", file=sys.stderr)
-        return False
-
     try:
         if follow:
-            # Use subprocess to tail -f
             try:
-                subprocess.run(
-                    ["tail", "-f", "-n", str(lines), str(LOG_FILE)],
-                    check=True,
-                )
+                _tail_follow(LOG_FILE, lines)
             except KeyboardInterrupt:
                 pass
         else:
-            # Read and print last N lines
-            with open(LOG_FILE, "r") as f:
-                content = f.readlines()
-                # Print last N lines
-                for line in content[-lines:]:
-                    print(line, end="")
+            # Seek back to the last N lines instead of reading the whole file
+            with open(LOG_FILE, "rb") as f:
+                f.seek(_tail_offset(f, lines))
+                print(f.read().decode("utf-8", errors="replace"), end="")
 
         return True
 
+    except FileNotFoundError:
+        print("No log file found", file=sys.stderr)
+        return False
     except Exception as e:
         print(f"Failed to read logs: {e}", file=sys.stderr)
         return False
@@ -0,0 +1,61 @@
+"""
+Shared pytest configuration for the test suite.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.completion_usage import CompletionUsage
+
+from local_openai2anthropic import daemon
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_openai_models():
+    """Instantiate the OpenAI response models once so their validators are built up front."""
+    ChatCompletionMessage(role="assistant", content="")
+    ChatCompletion(
+        id="x",
+        model="x",
+        object="chat.completion",
+        created=0,
+        choices=[],
+        usage=CompletionUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+    )
+
+
+@pytest.fixture
+def daemon_state(monkeypatch):
+    """Make a test see a fresh process with no daemon state cached yet.
+
+    Daemon test modules apply it to every test through ``pytestmark``.
+    """
+    monkeypatch.setattr(daemon, "_dirs_ensured", False)
+    monkeypatch.setattr(daemon, "_config_cache", {})
+
+
+@pytest.fixture
+def daemon_mocks(monkeypatch):
+    """Replace the daemon's pidfile, config and process helpers with mocks.
+
+    Defaults describe a stopped server with nothing on the port; tests adjust
+    ``return_value``/``side_effect`` on the returned namespace as needed.
+    """
+    mocks = SimpleNamespace(
+        _read_pid=MagicMock(return_value=None),
+        _load_daemon_config=MagicMock(return_value=None),
+        _save_daemon_config=MagicMock(),
+        _remove_pid=MagicMock(),
+        _remove_daemon_config=MagicMock(),
+        _ensure_dirs=MagicMock(),
+        _is_process_running=MagicMock(return_value=False),
+        _is_port_in_use=MagicMock(return_value=False),
+        _wait_for_exit=MagicMock(return_value=True),
+    )
+    for name, mock in vars(mocks).items():
+        monkeypatch.setattr(daemon, name, mock)
+    mocks.kill = MagicMock()
+    monkeypatch.setattr(daemon.os, "kill", mocks.kill)
+    return mocks
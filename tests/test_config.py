@@ -3,11 +3,15 @@ Tests for the config module.
 """
 
 from pathlib import Path
+from types import MappingProxyType
 
 import pytest
+from pydantic import ValidationError
 
 from local_openai2anthropic.config import (
     Settings,
+    _config_dir_override,
+    _read_file_bytes,
     create_config_from_dict,
     create_default_config,
     get_config_dir,
@@ -16,8 +20,61 @@ from local_openai2anthropic.config import (
     interactive_setup,
     is_interactive,
     load_config_from_file,
+    reset_settings,
 )
 
+# Field values passed to Settings in test_settings_initialization, as dumped
+# back out (CORS lists come back as tuples)
+EXPECTED_SETTINGS = MappingProxyType(
+    {
+        "openai_api_key": "test-key",
+        "openai_base_url": "https://custom.api.com",
+        "openai_org_id": "org-123",
+        "openai_project_id": "proj-456",
+        "host": "127.0.0.1",
+        "port": 9000,
+        "request_timeout": 60.0,
+        "api_key": "server-api-key",
+        "tavily_api_key": "tavily-key",
+        "tavily_timeout": 15.0,
+        "tavily_max_results": 10,
+        "websearch_max_uses": 3,
+        "log_level": "INFO",
+        "cors_origins": ("https://example.com",),
+        "cors_credentials": False,
+        "cors_methods": ("GET", "POST"),
+        "cors_headers": ("Authorization", "Content-Type"),
+    }
+)
+
+# Under pytest-xdist (--dist loadgroup) these tests share one worker; classes
+# that clear the get_settings cache are grouped separately below.
+pytestmark = pytest.mark.xdist_group(name="config_fs")
+
+
+@pytest.fixture
+def oa2a_dir(tmp_path):
+    """Point the config dir at a real temporary directory."""
+    token = _config_dir_override.set(tmp_path / ".oa2a")
+    yield tmp_path / ".oa2a"
+    _config_dir_override.reset(token)
+
+
+@pytest.fixture
+def fake_config_dir(fs):
+    """Point the config dir at an in-memory pyfakefs directory."""
+    config_dir = Path("/home/test/.oa2a")
+    fs.create_dir(config_dir.parent)
+    token = _config_dir_override.set(config_dir)
+    yield config_dir
+    _config_dir_override.reset(token)
+
+
+@pytest.fixture(scope="class")
+def base_settings():
+    """Baseline Settings shared by a test class; clone it for variations."""
+    return Settings(openai_api_key="test-key")
+
 
 class TestConfigFile:
     """Tests for config file management."""
@@ -28,6 +85,18 @@ class TestConfigFile:
         assert isinstance(config_dir, Path)
         assert config_dir.name == ".oa2a"
 
+    def test_config_dir_override(self, oa2a_dir):
+        """Test that the context-local override takes precedence."""
+        assert get_config_dir() == oa2a_dir
+        assert get_config_file() == oa2a_dir / "config.toml"
+
+    def test_config_dir_follows_home(self, monkeypatch, tmp_path):
+        """Test that a HOME change is picked up on the next call."""
+        get_config_dir()
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.setenv("USERPROFILE", str(tmp_path))
+        assert get_config_dir() == tmp_path / ".oa2a"
+
     def test_get_config_file(self):
         """Test getting config file path."""
         config_file = get_config_file()
@@ -35,50 +104,37 @@ class TestConfigFile:
         assert config_file.name == "config.toml"
         assert config_file.parent.name == ".oa2a"
 
-    def test_create_default_config(self, tmp_path, monkeypatch):
-        """Test creating default config file."""
-        # Mock get_config_dir to use temp directory
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
-        # Should create new file
-        created = create_default_config()
-        assert created is True
-        assert get_config_file().exists()
-
-        # Verify content
-        content = get_config_file().read_text()
-        assert "OA2A Configuration File" in content
-        assert 'openai_base_url = "https://api.openai.com/v1"' in content
-
-        # Should not create if exists
-        created = create_default_config()
-        assert created is False
+    @pytest.mark.parametrize("pre_exists,expected", [(False, True), (True, False)])
+    def test_create_default_config(self, fake_config_dir, pre_exists, expected):
+        """Test creating default config file, never overwriting an existing one."""
+        config_file = fake_config_dir / "config.toml"
+        if pre_exists:
+            fake_config_dir.mkdir(parents=True)
+            config_file.write_bytes(b"custom_config = true")
+
+        assert create_default_config() is expected
+
+        content = config_file.read_bytes().decode("utf-8")
+        if pre_exists:
+            assert content == "custom_config = true"
+        else:
+            assert "OA2A Configuration File" in content
+            assert 'openai_base_url = "https://api.openai.com/v1"' in content
+
+    def test_create_default_config_permissions(self, oa2a_dir):
+        """Test that the default config file and directory are private."""
+        import sys
 
-    def test_create_default_config_existing(self, tmp_path, monkeypatch):
-        """Test that existing config is not overwritten."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
+        assert create_default_config() is True
 
-        # Create config dir and file manually
-        config_dir = tmp_path / ".oa2a"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.toml"
-        config_file.write_text("custom_config = true")
+        if sys.platform != "win32":
+            import stat
 
-        # Should not overwrite
-        created = create_default_config()
-        assert created is False
-        assert config_file.read_text() == "custom_config = true"
+            assert stat.S_IMODE((oa2a_dir / "config.toml").stat().st_mode) == 0o600
+            assert stat.S_IMODE(oa2a_dir.stat().st_mode) == 0o700
 
-    def test_load_config_from_file(self, tmp_path, monkeypatch):
+    def test_load_config_from_file(self, fake_config_dir):
         """Test loading config from TOML file."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         # Create config file
         create_default_config()
 
@@ -89,27 +145,19 @@ class TestConfigFile:
         assert config["port"] == 8080
         assert config["host"] == "0.0.0.0"
 
-    def test_load_config_from_file_not_exists(self, tmp_path, monkeypatch):
+    def test_load_config_from_file_not_exists(self, fake_config_dir):
         """Test loading config when file doesn't exist."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         # Should return empty dict
         config = load_config_from_file()
         assert config == {}
 
-    def test_load_config_custom_values(self, tmp_path, monkeypatch):
+    def test_load_config_custom_values(self, fake_config_dir):
         """Test loading config with custom values."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         # Create config dir and file with custom values
-        config_dir = tmp_path / ".oa2a"
+        config_dir = fake_config_dir
         config_dir.mkdir(parents=True)
         config_file = config_dir / "config.toml"
-        config_file.write_text("""
+        config_file.write_bytes(b"""
 openai_api_key = "custom-key"
 host = "127.0.0.1"
 port = 9000
@@ -122,6 +170,37 @@ log_level = "INFO"
         assert config["port"] == 9000
         assert config["log_level"] == "INFO"
 
+    def test_load_config_cached_until_file_changes(self, fake_config_dir):
+        """Test that parsed config is reused until the file changes."""
+        fake_config_dir.mkdir(parents=True)
+        config_file = fake_config_dir / "config.toml"
+        config_file.write_bytes(b"port = 9000\n")
+
+        first = load_config_from_file()
+        first["port"] = 1  # callers may mutate their copy
+        assert load_config_from_file() == {"port": 9000}
+
+        config_file.write_bytes(b'port = 9001\nhost = "127.0.0.1"\n')
+        assert load_config_from_file() == {"port": 9001, "host": "127.0.0.1"}
+
+    def test_read_file_bytes_size_hint_too_small(self, fake_config_dir):
+        """Test that a stale size hint still returns the whole file."""
+        fake_config_dir.mkdir(parents=True)
+        config_file = fake_config_dir / "config.toml"
+        config_file.write_bytes(b"x" * 100000)
+
+        assert _read_file_bytes(config_file, 10) == b"x" * 100000
+        assert _read_file_bytes(config_file, 100000) == b"x" * 100000
+
+    def test_load_config_larger_than_one_read(self, fake_config_dir):
+        """Test loading a config file that needs more than one read call."""
+        fake_config_dir.mkdir(parents=True)
+        padding = b"# padding\n" * 10000
+        (fake_config_dir / "config.toml").write_bytes(padding + b'host = "127.0.0.1"\n')
+
+        config = load_config_from_file()
+        assert config == {"host": "127.0.0.1"}
+
 
 class TestSettings:
     """Tests for Settings class."""
@@ -148,42 +227,13 @@ class TestSettings:
             cors_headers=["Authorization", "Content-Type"],
         )
 
-        assert settings.openai_api_key == "test-key"
-        assert settings.openai_base_url == "https://custom.api.com"
-        assert settings.openai_org_id == "org-123"
-        assert settings.openai_project_id == "proj-456"
-        assert settings.host == "127.0.0.1"
-        assert settings.port == 9000
-        assert settings.request_timeout == 60.0
-        assert settings.api_key == "server-api-key"
-        assert settings.tavily_api_key == "tavily-key"
-        assert settings.tavily_timeout == 15.0
-        assert settings.tavily_max_results == 10
-        assert settings.websearch_max_uses == 3
-        assert settings.log_level == "INFO"
-        assert settings.cors_origins == ["https://example.com"]
-        assert settings.cors_credentials is False
-        assert settings.cors_methods == ["GET", "POST"]
-        assert settings.cors_headers == ["Authorization", "Content-Type"]
-
-    def test_settings_from_toml(self, tmp_path, monkeypatch):
+        assert settings.model_dump(include=set(EXPECTED_SETTINGS)) == EXPECTED_SETTINGS
+
+    def test_settings_from_toml(self, fake_config_dir):
         """Test creating Settings from TOML file."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.load_config_from_file",
-            lambda: {
-                "openai_api_key": "test-key",
-                "host": "127.0.0.1",
-                "port": 9000,
-            },
-        )
         # Create config with custom values
-        config_dir = tmp_path / ".oa2a"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.toml"
-        config_file.write_text("""
+        fake_config_dir.mkdir(parents=True)
+        (fake_config_dir / "config.toml").write_bytes(b"""
 openai_api_key = "test-key"
 host = "127.0.0.1"
 port = 9000
@@ -195,21 +245,13 @@ port = 9000
         assert settings.port == 9000
         # Default values should still apply
         assert settings.openai_base_url == "https://api.openai.com/v1"
+        assert settings.openai_auth_headers == {"Authorization": "Bearer test-key"}
 
-    def test_settings_from_toml_empty_file(self, tmp_path, monkeypatch):
+    def test_settings_from_toml_empty_file(self, fake_config_dir):
         """Test creating Settings from empty TOML file."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.load_config_from_file",
-            lambda: {},
-        )
         # Create empty config file
-        config_dir = tmp_path / ".oa2a"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.toml"
-        config_file.write_text("")
+        fake_config_dir.mkdir(parents=True)
+        (fake_config_dir / "config.toml").write_bytes(b"")
 
         settings = Settings.from_toml()
         # Should use all default values
@@ -217,53 +259,119 @@ port = 9000
         assert settings.host == "0.0.0.0"
         assert settings.port == 8080
 
-    def test_openai_auth_headers_basic(self):
-        """Test OpenAI auth headers with just API key."""
-        settings = Settings(
-            openai_api_key="test-key",
+    def test_settings_from_toml_model_mapping(self, monkeypatch):
+        """Test that from_toml builds model mapping rules."""
+        monkeypatch.setattr(
+            "local_openai2anthropic.config.load_config_from_file",
+            lambda: {
+                "default_model": "fallback",
+                "model_mapping": [{"from": "*opus*", "to": "kimi-k2.5"}],
+                "custom_field": "ignored",
+            },
         )
 
-        headers = settings.openai_auth_headers
+        settings = Settings.from_toml()
+
+        assert settings.resolve_model("claude-opus-4") == "kimi-k2.5"
+        assert settings.resolve_model("other") == "fallback"
+        assert not hasattr(settings, "custom_field")
+
+    def test_settings_from_toml_validates(self, monkeypatch):
+        """Test that from_toml coerces hand-edited values through validation."""
+        monkeypatch.setattr(
+            "local_openai2anthropic.config.load_config_from_file",
+            lambda: {"port": "9000", "request_timeout": 60},
+        )
+
+        settings = Settings.from_toml()
+
+        assert settings.port == 9000
+        assert isinstance(settings.request_timeout, float)
+
+    def test_settings_from_toml_rejects_invalid(self, monkeypatch):
+        """Test that from_toml rejects values that don't fit the field type."""
+        monkeypatch.setattr(
+            "local_openai2anthropic.config.load_config_from_file",
+            lambda: {"port": "not-a-port"},
+        )
+
+        with pytest.raises(ValidationError):
+            Settings.from_toml()
+
+    def test_openai_auth_headers_basic(self, base_settings):
+        """Test OpenAI auth headers with just API key."""
+        headers = base_settings.openai_auth_headers
 
         assert headers == {"Authorization": "Bearer test-key"}
 
-    def test_openai_auth_headers_with_org(self):
+    def test_openai_auth_headers_with_org(self, base_settings):
         """Test OpenAI auth headers with org ID."""
-        settings = Settings(
-            openai_api_key="test-key",
-            openai_org_id="org-123",
-        )
+        settings = base_settings.clone_with(openai_org_id="org-123")
 
         headers = settings.openai_auth_headers
 
         assert headers["Authorization"] == "Bearer test-key"
         assert headers["OpenAI-Organization"] == "org-123"
 
-    def test_openai_auth_headers_with_project(self):
+    def test_openai_auth_headers_with_project(self, base_settings):
         """Test OpenAI auth headers with project ID."""
-        settings = Settings(
-            openai_api_key="test-key",
-            openai_project_id="proj-456",
-        )
+        settings = base_settings.clone_with(openai_project_id="proj-456")
 
         headers = settings.openai_auth_headers
 
         assert headers["Authorization"] == "Bearer test-key"
         assert headers["OpenAI-Project"] == "proj-456"
 
-    def test_openai_auth_headers_full(self):
+    def test_openai_auth_headers_full(self, base_settings):
         """Test OpenAI auth headers with all options."""
-        settings = Settings(
-            openai_api_key="test-key",
+        settings = base_settings.clone_with(
             openai_org_id="org-123",
             openai_project_id="proj-456",
         )
 
-        headers = settings.openai_auth_headers
+        assert settings.openai_auth_headers == {
+            "Authorization": "Bearer test-key",
+            "OpenAI-Organization": "org-123",
+            "OpenAI-Project": "proj-456",
+        }
 
-        assert headers["Authorization"] == "Bearer test-key"
-        assert headers["OpenAI-Organization"] == "org-123"
-        assert headers["OpenAI-Project"] == "proj-456"
+    def test_openai_auth_headers_read_only(self, base_settings):
+        """Test that callers cannot mutate the shared auth headers."""
+        headers = base_settings.openai_auth_headers
+
+        with pytest.raises(TypeError):
+            headers["Authorization"] = "Bearer other-key"
+        assert base_settings.openai_auth_headers == {"Authorization": "Bearer test-key"}
+        assert "openai_auth_headers" not in base_settings.model_dump()
+
+    def test_settings_are_frozen(self, base_settings):
+        """Test that fields cannot be reassigned after construction."""
+        with pytest.raises(ValidationError):
+            base_settings.openai_api_key = "other-key"
+
+    def test_clone_with_refreshes_auth_headers(self, base_settings):
+        """Test that clone_with does not carry over cached auth headers."""
+        assert base_settings.openai_auth_headers == {"Authorization": "Bearer test-key"}
+
+        clone = base_settings.clone_with(openai_api_key="other-key")
+
+        assert clone is not base_settings
+        assert clone.openai_auth_headers == {"Authorization": "Bearer other-key"}
+        assert base_settings.openai_api_key == "test-key"
+
+    def test_clone_with_validates_overrides(self, base_settings):
+        """Test that clone_with rejects invalid field values."""
+        with pytest.raises(ValidationError):
+            base_settings.clone_with(port="not-a-port")
+
+    def test_clone_with_keeps_model_mapping(self):
+        """Test that clone_with round-trips the aliased mapping rules."""
+        settings = Settings(model_mapping=[{"from": "claude-*", "to": "gpt-4o"}])
+
+        clone = settings.clone_with(default_model="gpt-4o-mini")
+
+        assert clone.resolve_model("claude-3-opus") == "gpt-4o"
+        assert clone.default_model == "gpt-4o-mini"
 
     def test_openai_auth_headers_no_api_key(self):
         """Test OpenAI auth headers without API key."""
@@ -275,11 +383,10 @@ port = 9000
         assert "Authorization" in headers
         assert "Bearer" in headers["Authorization"]
 
-    def test_optional_api_keys(self):
+    def test_optional_api_keys(self, base_settings):
         """Test that optional API keys can be set or None."""
         # With explicit values
-        settings = Settings(
-            openai_api_key="test-key",
+        settings = base_settings.clone_with(
             api_key="server-key",
             tavily_api_key="tavily-key",
         )
@@ -303,10 +410,12 @@ port = 9000
         """Test default CORS settings."""
         settings = Settings()
 
-        assert settings.cors_origins == ["*"]
+        assert settings.cors_origins == ("*",)
         assert settings.cors_credentials is True
-        assert settings.cors_methods == ["*"]
-        assert settings.cors_headers == ["*"]
+        assert settings.cors_methods == ("*",)
+        assert settings.cors_headers == ("*",)
+        # Immutable defaults are shared rather than rebuilt per instance
+        assert settings.cors_origins is Settings().cors_origins
 
     def test_tavily_settings(self):
         """Test Tavily-specific settings."""
@@ -323,54 +432,67 @@ port = 9000
         assert settings.websearch_max_uses == 8
 
 
+@pytest.mark.xdist_group(name="config_get_settings")
 class TestGetSettings:
     """Tests for get_settings function."""
 
-    def test_returns_settings_instance(self, tmp_path, monkeypatch):
+    def test_returns_settings_instance(self, fake_config_dir):
         """Test that get_settings returns a Settings instance."""
         # Clear the cache first
-        get_settings.cache_clear()
-
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
+        reset_settings()
 
         settings = get_settings()
         assert isinstance(settings, Settings)
 
-    def test_caching(self, tmp_path, monkeypatch):
+    def test_caching(self, fake_config_dir):
         """Test that get_settings caches the result."""
         # Clear the cache first
-        get_settings.cache_clear()
-
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
+        reset_settings()
 
         settings1 = get_settings()
         settings2 = get_settings()
 
-        # Should be the same object due to @lru_cache
+        # Should be the same object due to the module-level cache
         assert settings1 is settings2
 
-    def test_get_settings_creates_default_config(self, tmp_path, monkeypatch, capsys):
-        """Test that get_settings creates default config and notifies user."""
-        # Clear the cache first
+    def test_reset_settings_reloads(self, fake_config_dir):
+        """Test that reset_settings makes get_settings reload the config."""
+        reset_settings()
+
+        settings1 = get_settings()
+        reset_settings()
+        settings2 = get_settings()
+
+        assert settings1 is not settings2
+
+    def test_cache_clear_compat(self, fake_config_dir):
+        """Test that get_settings.cache_clear() still drops the cached settings."""
+        reset_settings()
+
+        settings1 = get_settings()
         get_settings.cache_clear()
+        settings2 = get_settings()
+
+        assert settings1 is not settings2
 
+    def test_get_settings_creates_default_config(self, fake_config_dir, monkeypatch):
+        """Test that get_settings creates default config and notifies user."""
+        # Clear the cache first
+        reset_settings()
         monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
+            "local_openai2anthropic.config.is_interactive", lambda: False
         )
 
-        settings = get_settings()
+        messages = []
+        get_settings(notify=messages.append)
 
         # Check that config file was created
         assert get_config_file().exists()
 
-        # Check notification was printed
-        captured = capsys.readouterr()
-        assert "Created default config file" in captured.out
-        assert "Please edit it to add your API keys and settings" in captured.out
+        # Check notification was sent
+        assert len(messages) == 1
+        assert "Created default config file" in messages[0]
+        assert "Please edit it to add your API keys" in messages[0]
 
 
 class TestIsInteractive:
@@ -385,12 +507,8 @@ class TestIsInteractive:
 class TestCreateConfigFromDict:
     """Tests for create_config_from_dict function."""
 
-    def test_create_config_from_dict_basic(self, tmp_path, monkeypatch):
+    def test_create_config_from_dict_basic(self, fake_config_dir):
         """Test creating config file from dictionary with basic values."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         config = {
             "openai_api_key": "test-api-key",
             "openai_base_url": "https://api.openai.com/v1",
@@ -403,18 +521,14 @@ class TestCreateConfigFromDict:
         config_file = get_config_file()
         assert config_file.exists()
 
-        content = config_file.read_text()
+        content = config_file.read_bytes().decode("utf-8")
         assert 'openai_api_key = "test-api-key"' in content
         assert 'openai_base_url = "https://api.openai.com/v1"' in content
         assert 'host = "0.0.0.0"' in content
         assert "port = 8080" in content
 
-    def test_create_config_from_dict_with_optional_values(self, tmp_path, monkeypatch):
+    def test_create_config_from_dict_with_optional_values(self, fake_config_dir):
         """Test creating config with optional values."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         config = {
             "openai_api_key": "test-api-key",
             "api_key": "server-api-key",
@@ -423,44 +537,28 @@ class TestCreateConfigFromDict:
         create_config_from_dict(config)
 
         config_file = get_config_file()
-        content = config_file.read_text()
+        content = config_file.read_bytes().decode("utf-8")
 
         assert 'api_key = "server-api-key"' in content
 
-    def test_create_config_from_dict_without_optional_values(
-        self, tmp_path, monkeypatch
-    ):
+    def test_create_config_from_dict_without_optional_values(self, fake_config_dir):
         """Test creating config without optional values omits them."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         config = {
             "openai_api_key": "test-api-key",
         }
 
         create_config_from_dict(config)
 
-        config_file = get_config_file()
-        content = config_file.read_text()
-
         # Parse TOML to verify structure
-        import tomllib
-
-        with open(config_file, "rb") as f:
-            parsed = tomllib.load(f)
+        parsed = load_config_from_file()
 
         # Optional api_key should not be present when not provided
         assert "api_key" not in parsed
         # But openai_api_key should be present
         assert parsed["openai_api_key"] == "test-api-key"
 
-    def test_create_config_from_dict_custom_host_port(self, tmp_path, monkeypatch):
+    def test_create_config_from_dict_custom_host_port(self, fake_config_dir):
         """Test creating config with custom host and port."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         config = {
             "openai_api_key": "test-key",
             "host": "127.0.0.1",
@@ -470,18 +568,14 @@ class TestCreateConfigFromDict:
         create_config_from_dict(config)
 
         config_file = get_config_file()
-        content = config_file.read_text()
+        content = config_file.read_bytes().decode("utf-8")
 
         assert 'host = "127.0.0.1"' in content
         assert "port = 9000" in content
 
-    def test_create_config_from_dict_creates_directory(self, tmp_path, monkeypatch):
+    def test_create_config_from_dict_creates_directory(self, fake_config_dir):
         """Test that create_config_from_dict creates the config directory."""
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
-        config_dir = tmp_path / ".oa2a"
+        config_dir = fake_config_dir
         assert not config_dir.exists()
 
         create_config_from_dict({"openai_api_key": "test"})
@@ -489,14 +583,10 @@ class TestCreateConfigFromDict:
         assert config_dir.exists()
         assert config_dir.is_dir()
 
-    def test_create_config_file_permissions(self, tmp_path, monkeypatch):
+    def test_create_config_file_permissions(self, oa2a_dir):
         """Test that created config file has correct permissions."""
         import sys
 
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
-
         create_config_from_dict({"openai_api_key": "test"})
 
         if sys.platform != "win32":
@@ -523,7 +613,7 @@ class TestInteractiveSetup:
             lambda: Path("/tmp/.oa2a/config.toml"),
         )
 
-        # Mock input for all inputs
+        # Answers for all prompts
         inputs = iter(
             [
                 "openai-api-key",  # api_key (required)
@@ -533,9 +623,7 @@ class TestInteractiveSetup:
                 "server-api-key",  # server api_key
             ]
         )
-        monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
-
-        config = interactive_setup()
+        config = interactive_setup(prompt_fn=lambda prompt: next(inputs))
 
         assert config["openai_api_key"] == "openai-api-key"
         assert config["openai_base_url"] == "https://custom.api.com"
@@ -550,11 +638,9 @@ class TestInteractiveSetup:
             lambda: Path("/tmp/.oa2a/config.toml"),
         )
 
-        # Mock input - api key + all empty to accept defaults
+        # Answers - api key + all empty to accept defaults
         inputs = iter(["openai-api-key", "", "", "", ""])
-        monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
-
-        config = interactive_setup()
+        config = interactive_setup(prompt_fn=lambda prompt: next(inputs))
 
         assert config["openai_api_key"] == "openai-api-key"
         assert config["openai_base_url"] == "https://api.openai.com/v1"
@@ -569,14 +655,26 @@ class TestInteractiveSetup:
             lambda: Path("/tmp/.oa2a/config.toml"),
         )
 
-        # Mock input with invalid port
+        # Answers with invalid port
         inputs = iter(["openai-api-key", "", "", "invalid", ""])
-        monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
-
-        config = interactive_setup()
+        config = interactive_setup(prompt_fn=lambda prompt: next(inputs))
 
         assert config["port"] == 8080  # Should fall back to default
 
+    @pytest.mark.parametrize("port", ["0", "65536", "-1", "80.5"])
+    def test_interactive_setup_out_of_range_port(self, monkeypatch, capsys, port):
+        """Test that out-of-range or non-integer ports fall back to default."""
+        monkeypatch.setattr(
+            "local_openai2anthropic.config.get_config_file",
+            lambda: Path("/tmp/.oa2a/config.toml"),
+        )
+
+        inputs = iter(["openai-api-key", "", "", port, ""])
+        config = interactive_setup(prompt_fn=lambda prompt: next(inputs))
+
+        assert config["port"] == 8080
+        assert "Invalid port number" in capsys.readouterr().out
+
     def test_interactive_setup_requires_api_key(self, monkeypatch):
         """Test that interactive setup requires API key."""
         monkeypatch.setattr(
@@ -584,28 +682,24 @@ class TestInteractiveSetup:
             lambda: Path("/tmp/.oa2a/config.toml"),
         )
 
-        # Mock input - first empty (rejected), then valid
+        # Answers - first empty (rejected), then valid
         inputs = iter(["", "openai-api-key", "", "", "", ""])
-        monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
-
-        config = interactive_setup()
+        config = interactive_setup(prompt_fn=lambda prompt: next(inputs))
 
         assert config["openai_api_key"] == "openai-api-key"
 
 
+@pytest.mark.xdist_group(name="config_get_settings")
 class TestGetSettingsInteractive:
     """Tests for get_settings with interactive mode."""
 
     def test_get_settings_non_interactive_creates_default(
-        self, tmp_path, monkeypatch, capsys
+        self, fake_config_dir, monkeypatch, caplog
     ):
         """Test get_settings in non-interactive mode creates default config."""
         # Clear cache
-        get_settings.cache_clear()
+        reset_settings()
 
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
         monkeypatch.setattr(
             "local_openai2anthropic.config.is_interactive", lambda: False
         )
@@ -617,17 +711,16 @@ class TestGetSettingsInteractive:
         assert isinstance(settings, Settings)
 
         # Check notification
-        captured = capsys.readouterr()
-        assert "Created default config file" in captured.out
+        assert any(
+            "Created default config file" in record.getMessage()
+            for record in caplog.records
+        )
 
-    def test_get_settings_interactive_mode(self, tmp_path, monkeypatch, capsys):
+    def test_get_settings_interactive_mode(self, fake_config_dir, monkeypatch, capsys):
         """Test get_settings in interactive mode runs setup wizard."""
         # Clear cache
-        get_settings.cache_clear()
+        reset_settings()
 
-        monkeypatch.setattr(
-            "local_openai2anthropic.config.get_config_dir", lambda: tmp_path / ".oa2a"
-        )
         monkeypatch.setattr(
             "local_openai2anthropic.config.is_interactive", lambda: True
         )
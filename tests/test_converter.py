@@ -2,9 +2,13 @@
 Tests for the converter module.
 """
 
-import json
+from __future__ import annotations
+
+import re
+from types import MappingProxyType
+from typing import Any, Mapping
+
 import pytest
-from anthropic.types.message_create_params import MessageCreateParams
 from openai.types.chat import (
     ChatCompletion,
     ChatCompletionMessage,
@@ -13,6 +17,7 @@ from openai.types.chat.chat_completion import Choice
 from openai.types.completion_usage import CompletionUsage
 
 from local_openai2anthropic.converter import (
+    _BILLING_RE,
     _strip_claude_billing_header,
     convert_anthropic_to_openai,
     convert_openai_to_anthropic,
@@ -20,15 +25,62 @@ from local_openai2anthropic.converter import (
 )
 from local_openai2anthropic.protocol import UsageWithCache
 
+_BASE_PARAMS: Mapping[str, Any] = MappingProxyType({"model": "gpt-4o", "max_tokens": 1024})
+# Read-only conversation reused by every test that only needs a trivial prompt.
+_HI_MESSAGES = ({"role": "user", "content": "Hi"},)
+_TOOL_CALL_ARGS_TOKYO = '{"location": "Tokyo"}'
+
+
+@pytest.fixture(scope="class")
+def base_usage():
+    """Usage block shared by the OpenAI-to-Anthropic tests."""
+    return CompletionUsage.model_construct(
+        prompt_tokens=10,
+        completion_tokens=20,
+        total_tokens=30,
+    )
+
+
+@pytest.fixture(scope="session")
+def completion_factory():
+    """Return a builder that derives ChatCompletion variants from one template."""
+    template = ChatCompletion.model_construct(
+        id="test-id",
+        model="gpt-4o",
+        object="chat.completion",
+        created=1234567890,
+        choices=[],
+        usage=None,
+    )
+
+    def make(*, usage, content=None, tool_calls=None, finish_reason="stop"):
+        return template.model_copy(
+            update={
+                "choices": [
+                    Choice.model_construct(
+                        index=0,
+                        message=ChatCompletionMessage.model_construct(
+                            role="assistant",
+                            content=content,
+                            tool_calls=tool_calls,
+                        ),
+                        finish_reason=finish_reason,
+                    )
+                ],
+                "usage": usage,
+            }
+        )
+
+    return make
+
 
 class TestAnthropicToOpenAI:
     """Tests for Anthropic to OpenAI conversion."""
 
     def test_simple_message(self):
         """Test simple text message conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
+        params = {
+            **_BASE_PARAMS,
             "messages": [
                 {"role": "user", "content": "Hello!"}
             ],
@@ -43,9 +95,8 @@ class TestAnthropicToOpenAI:
 
     def test_system_message(self):
         """Test system message conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
+        params = {
+            **_BASE_PARAMS,
             "system": "You are a helpful assistant.",
             "messages": [
                 {"role": "user", "content": "Hello!"}
@@ -57,25 +108,10 @@ class TestAnthropicToOpenAI:
         assert result["messages"][0] == {"role": "system", "content": "You are a helpful assistant."}
         assert result["messages"][1] == {"role": "user", "content": "Hello!"}
 
-    def test_streaming(self):
-        """Test streaming parameter conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "stream": True,
-        }
-        
-        result = convert_anthropic_to_openai(params)
-        
-        assert result["stream"] is True
-        assert result["stream_options"] == {"include_usage": True}
-
     def test_tools(self):
         """Test tool conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
+        params = {
+            **_BASE_PARAMS,
             "messages": [{"role": "user", "content": "What's the weather?"}],
             "tools": [
                 {
@@ -100,70 +136,34 @@ class TestAnthropicToOpenAI:
         assert result["tools"][0]["type"] == "function"
         assert result["tools"][0]["function"]["name"] == "get_weather"
 
-    def test_temperature_and_top_p(self):
-        """Test temperature and top_p conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "temperature": 0.7,
-            "top_p": 0.9,
+    @pytest.mark.parametrize(
+        "extra,expected",
+        [
+            ({"stream": True}, {"stream": True, "stream_options": {"include_usage": True}}),
+            ({"temperature": 0.7, "top_p": 0.9}, {"temperature": 0.7, "top_p": 0.9}),
+            ({"top_k": 50}, {"top_k": 50}),
+            ({"stop_sequences": ["STOP", "END"]}, {"stop": ["STOP", "END"]}),
+        ],
+        ids=["streaming", "temperature_and_top_p", "top_k", "stop_sequences"],
+    )
+    def test_scalar_params(self, extra, expected):
+        """Test scalar request parameter conversion."""
+        params = {
+            **_BASE_PARAMS,
+            "messages": _HI_MESSAGES,
+            **extra,
         }
-        
-        result = convert_anthropic_to_openai(params)
-        
-        assert result["temperature"] == 0.7
-        assert result["top_p"] == 0.9
 
-    def test_top_k(self):
-        """Test top_k parameter conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "top_k": 50,
-        }
-        
         result = convert_anthropic_to_openai(params)
-        
-        assert result["top_k"] == 50
 
-    def test_stop_sequences(self):
-        """Test stop sequences conversion."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "stop_sequences": ["STOP", "END"],
-        }
-        
-        result = convert_anthropic_to_openai(params)
-        
-        assert result["stop"] == ["STOP", "END"]
-
-    def test_thinking_enabled(self):
-        """Test thinking enabled conversion."""
-        params: MessageCreateParams = {
-            "model": "deepseek-r1",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "thinking": {"type": "enabled"},
-        }
-        
-        result = convert_anthropic_to_openai(params)
-        
-        assert result["chat_template_kwargs"] == {
-            "thinking": True,
-            "enable_thinking": True,
-            "preserve_thinking": True,
-        }
+        assert {k: result.get(k) for k in expected} == expected
 
     def test_thinking_with_output_config_effort(self):
         """Test Anthropic output_config.effort conversion."""
-        params: MessageCreateParams = {
+        params = {
             "model": "deepseek-ai/DeepSeek-V4-Flash",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "adaptive"},
             "output_config": {"effort": "max"},
         }
@@ -179,10 +179,10 @@ class TestAnthropicToOpenAI:
 
     def test_thinking_with_xhigh_output_config_effort(self):
         """Test xhigh effort is forwarded as an Anthropic effort tier."""
-        params: MessageCreateParams = {
+        params = {
             "model": "deepseek-ai/DeepSeek-V4-Flash",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "adaptive"},
             "output_config": {"effort": "xhigh"},
         }
@@ -198,10 +198,10 @@ class TestAnthropicToOpenAI:
 
     def test_deepseek_v4_thinking_defaults_to_high_reasoning_effort(self):
         """Test DeepSeek V4 thinking defaults to high effort."""
-        params: MessageCreateParams = {
+        params = {
             "model": "deepseek-ai/DeepSeek-V4-Flash",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "enabled"},
         }
 
@@ -216,10 +216,10 @@ class TestAnthropicToOpenAI:
 
     def test_thinking_budget_does_not_infer_reasoning_effort(self):
         """Test budget_tokens does not infer an Anthropic effort tier."""
-        params: MessageCreateParams = {
+        params = {
             "model": "deepseek-ai/DeepSeek-V4-Flash",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "enabled", "budget_tokens": 64000},
         }
 
@@ -232,52 +232,61 @@ class TestAnthropicToOpenAI:
             "reasoning_effort": "high",
         }
 
-    def test_thinking_disabled(self):
-        """Test thinking disabled conversion."""
-        params: MessageCreateParams = {
-            "model": "deepseek-r1",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "thinking": {"type": "disabled"},
-        }
-        
-        result = convert_anthropic_to_openai(params)
-        
-        assert result["chat_template_kwargs"] == {"thinking": False, "enable_thinking": False}
-
-    def test_thinking_with_budget(self):
-        """Test thinking with budget_tokens (accepted but ignored)."""
-        params: MessageCreateParams = {
-            "model": "deepseek-r1",
+    @pytest.mark.parametrize(
+        "model,thinking,expected",
+        [
+            (
+                "deepseek-r1",
+                {"type": "enabled"},
+                {"thinking": True, "enable_thinking": True, "preserve_thinking": True},
+            ),
+            (
+                "deepseek-r1",
+                {"type": "disabled"},
+                {"thinking": False, "enable_thinking": False},
+            ),
+            (
+                "deepseek-r1",
+                {"type": "enabled", "budget_tokens": 2048},
+                {"thinking": True, "enable_thinking": True, "preserve_thinking": True},
+            ),
+            (
+                "claude-opus-4-6",
+                {"type": "adaptive"},
+                {"thinking": True, "enable_thinking": True, "preserve_thinking": True},
+            ),
+        ],
+        ids=["enabled", "disabled", "budget_ignored", "adaptive"],
+    )
+    def test_thinking(self, model, thinking, expected):
+        """Test thinking config conversion to chat_template_kwargs."""
+        params = {
+            "model": model,
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
-            "thinking": {"type": "enabled", "budget_tokens": 2048},
+            "messages": _HI_MESSAGES,
+            "thinking": thinking,
         }
 
         result = convert_anthropic_to_openai(params)
 
-        assert result["chat_template_kwargs"] == {
-            "thinking": True,
-            "enable_thinking": True,
-            "preserve_thinking": True,
-        }
+        assert result["chat_template_kwargs"] == expected
 
-    def test_thinking_adaptive(self):
-        """Test adaptive thinking mode."""
-        params: MessageCreateParams = {
-            "model": "claude-opus-4-6",
-            "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+    def test_reasoning_effort_does_not_leak_between_requests(self):
+        """Test a request with effort does not change the kwargs of the next one."""
+        with_effort = convert_anthropic_to_openai({
+            **_BASE_PARAMS,
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "adaptive"},
-        }
+            "output_config": {"effort": "max"},
+        })
+        without_effort = convert_anthropic_to_openai({
+            **_BASE_PARAMS,
+            "messages": _HI_MESSAGES,
+            "thinking": {"type": "adaptive"},
+        })
 
-        result = convert_anthropic_to_openai(params)
-
-        assert result["chat_template_kwargs"] == {
-            "thinking": True,
-            "enable_thinking": True,
-            "preserve_thinking": True,
-        }
+        assert with_effort["chat_template_kwargs"]["reasoning_effort"] == "max"
+        assert "reasoning_effort" not in without_effort["chat_template_kwargs"]
 
     # --- GLM reasoning_effort mapping -------------------------------------
     # GLM chat templates (GLM-4.5/4.6/4.7/5.x) only wire two effective levels:
@@ -287,10 +296,10 @@ class TestAnthropicToOpenAI:
     # Anthropic low/medium -> GLM "high", and high/xhigh/max/unset -> unset.
     def test_glm_thinking_no_effort_defaults_to_max(self):
         """GLM with thinking on and no effort should not set reasoning_effort (Max)."""
-        params: MessageCreateParams = {
+        params = {
             "model": "glm-5-2-pro",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "enabled"},
         }
 
@@ -304,10 +313,10 @@ class TestAnthropicToOpenAI:
 
     def test_glm_thinking_low_effort_maps_to_high(self):
         """Anthropic low effort (want less reasoning) maps to GLM 'high' (GLM's low)."""
-        params: MessageCreateParams = {
+        params = {
             "model": "glm-5-2-pro",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "enabled"},
             "output_config": {"effort": "low"},
         }
@@ -323,10 +332,10 @@ class TestAnthropicToOpenAI:
 
     def test_glm_thinking_medium_effort_maps_to_high(self):
         """Anthropic medium effort also maps to GLM 'high' (GLM has no middle band)."""
-        params: MessageCreateParams = {
+        params = {
             "model": "zai-org/GLM-5.2-FP8",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "adaptive"},
             "output_config": {"effort": "medium"},
         }
@@ -343,10 +352,10 @@ class TestAnthropicToOpenAI:
     @pytest.mark.parametrize("effort", ["high", "xhigh", "max"])
     def test_glm_thinking_high_effort_defaults_to_max(self, effort):
         """Anthropic high/xhigh/max (want more reasoning) leaves GLM at Max (unset)."""
-        params: MessageCreateParams = {
+        params = {
             "model": "glm-5-2-pro",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "enabled"},
             "output_config": {"effort": effort},
         }
@@ -361,10 +370,10 @@ class TestAnthropicToOpenAI:
 
     def test_deepseek_v4_effort_not_affected_by_glm_branch(self):
         """DeepSeek V4 still forwards the raw Anthropic tier verbatim."""
-        params: MessageCreateParams = {
+        params = {
             "model": "deepseek-ai/DeepSeek-V4-Flash",
             "max_tokens": 1024,
-            "messages": [{"role": "user", "content": "Hi"}],
+            "messages": _HI_MESSAGES,
             "thinking": {"type": "enabled"},
             "output_config": {"effort": "low"},
         }
@@ -378,56 +387,40 @@ class TestAnthropicToOpenAI:
 class TestStripClaudeBillingHeader:
     """Tests for Claude billing header stripping."""
 
-    def test_strip_billing_header_from_system(self):
-        """Test that Claude billing header is stripped from system prompts."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "system": """You are a helpful assistant.
-x-anthropic-billing-header:cc version=2.1.37.3a3;cc_entrypoint=claude-vscode;cch=694d6;
-Be helpful.""",
-            "messages": [
-                {"role": "user", "content": "Hello!"}
-            ],
-        }
-
-        result = convert_anthropic_to_openai(params)
-
-        # The billing header should be stripped
-        system_content = result["messages"][0]["content"]
-        assert "x-anthropic-billing-header" not in system_content
-        assert "cch=" not in system_content
-        assert "You are a helpful assistant." in system_content
-        assert "Be helpful." in system_content
-
-    def test_strip_billing_header_with_different_cch(self):
-        """Test that different cch values are all stripped."""
-        params1: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "system": "Test content\nx-anthropic-billing-header:cc version=2.1.37;cch=aaaa;",
-            "messages": [{"role": "user", "content": "Hi"}],
-        }
-
-        params2: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "system": "Test content\nx-anthropic-billing-header:cc version=2.1.37;cch=bbbb;",
-            "messages": [{"role": "user", "content": "Hi"}],
-        }
-
-        result1 = convert_anthropic_to_openai(params1)
-        result2 = convert_anthropic_to_openai(params2)
-
-        # Both should produce the same cleaned content
-        assert result1["messages"][0]["content"] == result2["messages"][0]["content"]
-        assert result1["messages"][0]["content"] == "Test content"
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            (
+                "You are a helpful assistant.\n"
+                "x-anthropic-billing-header:cc version=2.1.37.3a3;cc_entrypoint=claude-vscode;cch=694d6;\n"
+                "Be helpful.",
+                "You are a helpful assistant.\nBe helpful.",
+            ),
+            ("Test content\nx-anthropic-billing-header:cc version=2.1.37;cch=aaaa;", "Test content"),
+            ("Test content\nx-anthropic-billing-header:cc version=2.1.37;cch=bbbb;", "Test content"),
+            (
+                "Some text\nx-anthropic-billing-header:cc version=2.1.37;cch=abc123;\nMore text",
+                "Some text\nMore text",
+            ),
+            ("You are a helpful assistant. Be polite.", "You are a helpful assistant. Be polite."),
+            ("Some text\nMore text", "Some text\nMore text"),
+            ("Test content\nx-anthropic-billing-header:CC Version=2.1.37;CCH=AbC12;", "Test content"),
+            ("", ""),
+            (None, None),
+        ],
+        ids=[
+            "system", "cch_aaaa", "cch_bbbb", "mid_text", "no_header",
+            "multiline_no_header", "mixed_case_params", "empty", "none",
+        ],
+    )
+    def test_strip_claude_billing_header(self, text, expected):
+        """Test the helper function directly."""
+        assert _strip_claude_billing_header(text) == expected
 
     def test_strip_billing_header_from_list_system(self):
         """Test that billing header is stripped from list-style system prompts."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
+        params = {
+            **_BASE_PARAMS,
             "system": [
                 {
                     "type": "text",
@@ -445,70 +438,42 @@ Be helpful.""",
 
         result = convert_anthropic_to_openai(params)
 
-        system_content = result["messages"][0]["content"]
-        assert "x-anthropic-billing-header" not in system_content
-        assert "cch=" not in system_content
-        assert "You are helpful." in system_content
-        assert "Be polite." in system_content
-
-    def test_no_billing_header_unchanged(self):
-        """Test that prompts without billing header are unchanged."""
-        params: MessageCreateParams = {
-            "model": "gpt-4o",
-            "max_tokens": 1024,
-            "system": "You are a helpful assistant. Be polite.",
-            "messages": [
-                {"role": "user", "content": "Hello!"}
-            ],
-        }
-
-        result = convert_anthropic_to_openai(params)
-
-        assert result["messages"][0]["content"] == "You are a helpful assistant. Be polite."
+        assert result["messages"][0]["content"] == "You are helpful.\nBe polite."
+
+    def test_no_billing_header_returns_same_object(self):
+        """Test prompts without a header skip the regex and come back untouched."""
+        text = "You are a helpful assistant. Be polite."
+        assert _strip_claude_billing_header(text) is text
+
+    def test_billing_pattern_is_precompiled(self):
+        """Test the billing header regex is compiled once at module level."""
+        assert isinstance(_BILLING_RE, re.Pattern)
+        assert _BILLING_RE.pattern == r"x-anthropic-billing-header:(?i:.*?cch=[a-zA-Z0-9]+;?)"
+        # A global IGNORECASE would disable sre's literal-prefix search.
+        assert not _BILLING_RE.flags & re.IGNORECASE
+
+    def test_strip_billing_header_large_prompt(self):
+        """Test every header is stripped from a large multi-header prompt."""
+        header = "x-anthropic-billing-header:cc version=2.1.37;cch={};"
+        chunk = "Some instructions. " * 300
+        text = "\n".join(
+            part
+            for i in range(20)
+            for part in (chunk, header.format(f"{i:05x}"))
+        )
 
-    def test_strip_claude_billing_header_function(self):
-        """Test the helper function directly."""
-        # Test with billing header
-        text = "Some text\nx-anthropic-billing-header:cc version=2.1.37;cch=abc123;\nMore text"
         result = _strip_claude_billing_header(text)
-        assert result == "Some text\nMore text"
 
-        # Test without billing header
-        text2 = "Some text\nMore text"
-        result2 = _strip_claude_billing_header(text2)
-        assert result2 == "Some text\nMore text"
-
-        # Test empty
-        assert _strip_claude_billing_header("") == ""
-        assert _strip_claude_billing_header(None) is None
+        assert len(text) > 100_000
+        assert result == "\n".join([chunk] * 20).strip()
 
 
 class TestOpenAIToAnthropic:
     """Tests for OpenAI to Anthropic conversion."""
 
-    def test_simple_response(self):
+    def test_simple_response(self, completion_factory, base_usage):
         """Test simple text response conversion."""
-        completion = ChatCompletion(
-            id="test-id",
-            model="gpt-4o",
-            object="chat.completion",
-            created=1234567890,
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        role="assistant",
-                        content="Hello! How can I help?",
-                    ),
-                    finish_reason="stop",
-                )
-            ],
-            usage=CompletionUsage(
-                prompt_tokens=10,
-                completion_tokens=20,
-                total_tokens=30,
-            ),
-        )
+        completion = completion_factory(content="Hello! How can I help?", usage=base_usage)
         
         result = convert_openai_to_anthropic(completion, "gpt-4o")
         
@@ -519,37 +484,24 @@ class TestOpenAIToAnthropic:
         assert len(result.content) == 1
         assert result.content[0].type == "text"
         assert result.content[0].text == "Hello! How can I help?"
-        assert result.usage.input_tokens == 10
-        assert result.usage.output_tokens == 20
+        assert result.usage.input_tokens == base_usage.prompt_tokens == 10
+        assert result.usage.output_tokens == base_usage.completion_tokens == 20
 
-    def test_tool_call_response(self):
+    def test_tool_call_response(self, completion_factory):
         """Test tool call response conversion."""
-        completion = ChatCompletion(
-            id="test-id",
-            model="gpt-4o",
-            object="chat.completion",
-            created=1234567890,
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        role="assistant",
-                        content=None,
-                        tool_calls=[
-                            {
-                                "id": "call_123",
-                                "type": "function",
-                                "function": {
-                                    "name": "get_weather",
-                                    "arguments": json.dumps({"location": "Tokyo"}),
-                                },
-                            }
-                        ],
-                    ),
-                    finish_reason="tool_calls",
-                )
+        completion = completion_factory(
+            tool_calls=[
+                {
+                    "id": "call_123",
+                    "type": "function",
+                    "function": {
+                        "name": "get_weather",
+                        "arguments": _TOOL_CALL_ARGS_TOKYO,
+                    },
+                }
             ],
-            usage=CompletionUsage(
+            finish_reason="tool_calls",
+            usage=CompletionUsage.model_construct(
                 prompt_tokens=20,
                 completion_tokens=30,
                 total_tokens=50,
@@ -565,24 +517,30 @@ class TestOpenAIToAnthropic:
         assert result.content[0].name == "get_weather"
         assert result.content[0].input == {"location": "Tokyo"}
 
-    def test_max_tokens_stop(self):
-        """Test max tokens stop reason conversion."""
-        completion = ChatCompletion(
-            id="test-id",
-            model="gpt-4o",
-            object="chat.completion",
-            created=1234567890,
-            choices=[
-                Choice(
-                    index=0,
-                    message=ChatCompletionMessage(
-                        role="assistant",
-                        content="Truncated...",
-                    ),
-                    finish_reason="length",
-                )
+    def test_tool_call_invalid_arguments_kept_raw(self, completion_factory, base_usage):
+        """Test unparseable tool_call arguments are passed through under "raw"."""
+        completion = completion_factory(
+            tool_calls=[
+                {
+                    "id": "call_123",
+                    "type": "function",
+                    "function": {"name": "get_weather", "arguments": '{"location": '},
+                }
             ],
-            usage=CompletionUsage(
+            finish_reason="tool_calls",
+            usage=base_usage,
+        )
+
+        result = convert_openai_to_anthropic(completion, "gpt-4o")
+
+        assert result.content[0].input == {"raw": '{"location": '}
+
+    def test_max_tokens_stop(self, completion_factory):
+        """Test max tokens stop reason conversion."""
+        completion = completion_factory(
+            content="Truncated...",
+            finish_reason="length",
+            usage=CompletionUsage.model_construct(
                 prompt_tokens=10,
                 completion_tokens=100,
                 total_tokens=110,
@@ -623,11 +581,14 @@ class TestThinkingBlockConversion:
 
         result, has_thinking = _convert_anthropic_message_to_openai(msg)
 
+        expected = {
+            "role": "assistant",
+            "reasoning": "User greeted me in Chinese.",
+            "reasoning_content": "User greeted me in Chinese.",
+            "content": "Hello! I'm Claude Code.",
+        }
         assert has_thinking is True
-        assert result[0]["role"] == "assistant"
-        assert result[0]["reasoning"] == "User greeted me in Chinese."
-        assert result[0]["reasoning_content"] == "User greeted me in Chinese."
-        assert result[0]["content"] == "Hello! I'm Claude Code."
+        assert {k: result[0].get(k) for k in expected} == expected
 
     def test_thinking_block_with_tool_use_block(self):
         """Test thinking block combined with tool_use block in content."""
@@ -642,12 +603,14 @@ class TestThinkingBlockConversion:
 
         result, has_thinking = _convert_anthropic_message_to_openai(msg)
 
+        expected = {
+            "reasoning": "I need to search for weather.",
+            "reasoning_content": "I need to search for weather.",
+            "content": "Let me check the weather for you.",
+        }
         assert has_thinking is True
-        assert "tool_calls" in result[0]
         assert result[0]["tool_calls"][0]["function"]["name"] == "web_search"
-        assert result[0]["reasoning"] == "I need to search for weather."
-        assert result[0]["reasoning_content"] == "I need to search for weather."
-        assert result[0]["content"] == "Let me check the weather for you."
+        assert {k: result[0].get(k) for k in expected} == expected
 
     def test_no_thinking_block(self):
         """Test message without thinking block."""
@@ -674,13 +637,16 @@ class TestThinkingBlockConversion:
 
         result, has_thinking = _convert_anthropic_message_to_openai(msg)
 
+        expected = {
+            "reasoning": "This is my thinking.",
+            "reasoning_content": "This is my thinking.",
+            "content": [
+                {"type": "text", "text": "First part."},
+                {"type": "text", "text": "Second part."},
+            ],
+        }
         assert has_thinking is True
-        assert result[0]["reasoning"] == "This is my thinking."
-        assert result[0]["reasoning_content"] == "This is my thinking."
-        assert result[0]["content"] == [
-            {"type": "text", "text": "First part."},
-            {"type": "text", "text": "Second part."},
-        ]
+        assert {k: result[0].get(k) for k in expected} == expected
 
     def test_thinking_block_string_content(self):
         """Test thinking block with string content (edge case)."""
@@ -706,6 +672,50 @@ class TestThinkingBlockConversion:
         assert has_thinking is False
         assert result[0]["content"] == ""
 
+    @pytest.mark.benchmark(group="convert_message")
+    def test_convert_message_benchmark(self, benchmark):
+        """Benchmark converting an assistant message with a thinking block."""
+        msg = {
+            "role": "assistant",
+            "content": [
+                {"type": "thinking", "thinking": "Let me think.", "signature": ""},
+                {"type": "text", "text": "Here is the answer."},
+                {"type": "tool_use", "id": "tool_1", "name": "web_search", "input": {"query": "weather"}},
+            ],
+        }
+
+        result, has_thinking = benchmark(_convert_anthropic_message_to_openai, msg)
+
+        assert has_thinking is True
+        assert result[0]["reasoning"] == "Let me think."
+
+
+class TestConverterBenchmarks:
+    """Opt-in timings for the request and response conversion paths."""
+
+    @pytest.mark.benchmark(group="converter")
+    def test_bench_anthropic_to_openai(self, benchmark):
+        """Benchmark a request whose ~10 KB system prompt carries a billing header."""
+        system = (
+            "You are a helpful assistant. " * 350
+            + "\nx-anthropic-billing-header:cc version=2.1.37;cch=abc12;\n"
+            + "Be helpful."
+        )
+        params = {**_BASE_PARAMS, "system": system, "messages": _HI_MESSAGES}
+
+        result = benchmark(convert_anthropic_to_openai, params)
+
+        assert "x-anthropic-billing-header" not in result["messages"][0]["content"]
+
+    @pytest.mark.benchmark(group="converter")
+    def test_bench_openai_to_anthropic(self, benchmark, completion_factory, base_usage):
+        """Benchmark converting a plain-text completion."""
+        completion = completion_factory(content="Hello! How can I help?", usage=base_usage)
+
+        result = benchmark(convert_openai_to_anthropic, completion, "gpt-4o")
+
+        assert result.content[0].text == "Hello! How can I help?"
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -2,8 +2,11 @@
 Tests for the daemon module.
 """
 
+import errno
 import json
+import os
 import signal
+import socket
 from pathlib import Path
 from unittest.mock import MagicMock, patch, mock_open
 
@@ -11,6 +14,8 @@ import pytest
 
 from local_openai2anthropic import daemon
 
+pytestmark = pytest.mark.usefixtures("daemon_state")
+
 
 class TestEnsureDirs:
     """Tests for _ensure_dirs function."""
@@ -22,54 +27,81 @@ class TestEnsureDirs:
                 daemon._ensure_dirs()
                 mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
 
+    def test_cached_after_first_call(self):
+        """Test that mkdir is only issued once per process."""
+        with patch.object(Path, "mkdir") as mock_mkdir:
+            daemon._ensure_dirs()
+            daemon._ensure_dirs()
+            assert mock_mkdir.call_count == 1
+
+    def test_not_cached_after_failure(self):
+        """Test that a failed mkdir is retried on the next call."""
+        with patch.object(Path, "mkdir", side_effect=[OSError, None]) as mock_mkdir:
+            with pytest.raises(OSError):
+                daemon._ensure_dirs()
+            daemon._ensure_dirs()
+            assert mock_mkdir.call_count == 2
+
 
 class TestReadPid:
     """Tests for _read_pid function."""
 
     def test_reads_valid_pid(self):
         """Test reading a valid PID file."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "read_text", return_value="12345"):
-                pid = daemon._read_pid()
-                assert pid == 12345
+        with patch.object(Path, "read_text", return_value="12345"):
+            pid = daemon._read_pid()
+            assert pid == 12345
 
     def test_missing_file(self):
         """Test when PID file doesn't exist."""
-        with patch.object(Path, "exists", return_value=False):
+        with patch.object(Path, "read_text", side_effect=FileNotFoundError):
             pid = daemon._read_pid()
             assert pid is None
 
     def test_invalid_content(self):
         """Test when PID file has invalid content."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "read_text", return_value="not_a_number"):
-                pid = daemon._read_pid()
-                assert pid is None
+        with patch.object(Path, "read_text", return_value="not_a_number"):
+            pid = daemon._read_pid()
+            assert pid is None
 
     def test_oserror(self):
         """Test when reading PID file raises OSError."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "read_text", side_effect=OSError):
-                pid = daemon._read_pid()
-                assert pid is None
+        with patch.object(Path, "read_text", side_effect=OSError):
+            pid = daemon._read_pid()
+            assert pid is None
+
+    def test_no_exists_probe(self):
+        """Test that the pidfile is read without a separate exists() stat."""
+        with patch.object(Path, "exists") as mock_exists:
+            with patch.object(Path, "read_text", return_value="12345"):
+                assert daemon._read_pid() == 12345
+            mock_exists.assert_not_called()
 
 
 class TestRemovePid:
     """Tests for _remove_pid function."""
 
-    def test_removes_file(self):
+    def test_removes_file(self, tmp_path):
         """Test removing PID file."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "unlink") as mock_unlink:
-                daemon._remove_pid()
-                mock_unlink.assert_called_once()
+        pid_file = tmp_path / "oa2a.pid"
+        pid_file.write_text("12345")
+        with patch.object(daemon, "PID_FILE", pid_file):
+            daemon._remove_pid()
+        assert not pid_file.exists()
 
     def test_missing_file(self):
         """Test when PID file doesn't exist."""
-        with patch.object(Path, "exists", return_value=False):
-            with patch.object(Path, "unlink") as mock_unlink:
-                daemon._remove_pid()
-                mock_unlink.assert_not_called()
+        with patch.object(Path, "unlink") as mock_unlink:
+            daemon._remove_pid()
+            mock_unlink.assert_called_once_with(missing_ok=True)
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """Point CONFIG_FILE at a temporary path."""
+    path = tmp_path / "oa2a.json"
+    with patch.object(daemon, "CONFIG_FILE", path):
+        yield path
 
 
 class TestSaveDaemonConfig:
@@ -78,47 +110,120 @@ class TestSaveDaemonConfig:
     def test_saves_config(self):
         """Test saving daemon configuration."""
         with patch.object(daemon, "_ensure_dirs"):
-            with patch.object(Path, "write_text") as mock_write:
+            with patch.object(daemon, "_write_atomic") as mock_write:
                 daemon._save_daemon_config("127.0.0.1", 9000)
                 mock_write.assert_called_once()
                 # Check that JSON was written
-                written = mock_write.call_args[0][0]
+                written = mock_write.call_args[0][1]
                 config = json.loads(written)
                 assert config["host"] == "127.0.0.1"
                 assert config["port"] == 9000
                 assert "started_at" in config
 
-    def test_oserror(self):
+    def test_saves_pid_start_time(self):
+        """Test that the daemon PID is saved with its start time."""
+        with patch.object(daemon, "_ensure_dirs"):
+            with patch.object(daemon, "_get_process_start_time", return_value=4242):
+                with patch.object(daemon, "_write_atomic") as mock_write:
+                    daemon._save_daemon_config("127.0.0.1", 9000, 12345)
+                    config = json.loads(mock_write.call_args[0][1])
+                    assert config["pid"] == 12345
+                    assert config["start_time"] == 4242
+
+    def test_atomic_replace_and_fsync(self, config_file):
+        """Test that the config is fsynced and renamed into place."""
+        with patch.object(daemon, "_ensure_dirs"):
+            with patch("os.replace", wraps=os.replace) as mock_replace:
+                with patch("os.fsync") as mock_fsync:
+                    daemon._save_daemon_config("127.0.0.1", 9000)
+                    mock_replace.assert_called_once_with(
+                        config_file.with_name("oa2a.json.tmp"), config_file
+                    )
+                    # The file itself and its directory
+                    assert mock_fsync.call_count == 2
+        assert json.loads(config_file.read_bytes())["port"] == 9000
+        assert not config_file.with_name("oa2a.json.tmp").exists()
+
+    def test_fsync_before_replace(self, config_file):
+        """Test that the temp file is on disk before it replaces the config."""
+        calls = []
+        with patch.object(daemon, "_ensure_dirs"):
+            with patch("os.replace", side_effect=lambda *a: calls.append("replace")):
+                with patch("os.fsync", side_effect=lambda fd: calls.append("fsync")):
+                    daemon._save_daemon_config("127.0.0.1", 9000)
+        assert calls == ["fsync", "replace", "fsync"]
+
+    def test_oserror(self, config_file):
         """Test handling of OSError."""
         with patch.object(daemon, "_ensure_dirs"):
-            with patch.object(Path, "write_text", side_effect=OSError):
+            with patch("os.replace", side_effect=OSError):
                 # Should not raise
                 daemon._save_daemon_config("127.0.0.1", 9000)
+        assert not config_file.with_name("oa2a.json.tmp").exists()
 
 
 class TestLoadDaemonConfig:
     """Tests for _load_daemon_config function."""
 
-    def test_loads_valid_config(self):
+    def test_loads_valid_config(self, config_file):
         """Test loading a valid config file."""
         config_data = {"host": "127.0.0.1", "port": 9000}
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "read_text", return_value=json.dumps(config_data)):
-                config = daemon._load_daemon_config()
-                assert config == config_data
+        config_file.write_text(json.dumps(config_data))
+        config = daemon._load_daemon_config()
+        assert config == config_data
 
-    def test_missing_file(self):
+    def test_missing_file(self, config_file):
         """Test when config file doesn't exist."""
-        with patch.object(Path, "exists", return_value=False):
-            config = daemon._load_daemon_config()
-            assert config is None
+        config = daemon._load_daemon_config()
+        assert config is None
 
-    def test_invalid_json(self):
+    def test_invalid_json(self, config_file):
         """Test when config file has invalid JSON."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "read_text", return_value="invalid json"):
-                config = daemon._load_daemon_config()
-                assert config is None
+        config_file.write_text("invalid json")
+        config = daemon._load_daemon_config()
+        assert config is None
+
+    def test_cache_hit_avoids_read(self, config_file):
+        """Test that an unchanged file is parsed only once."""
+        config_file.write_text(json.dumps({"port": 9000}))
+        with patch.object(Path, "read_bytes", wraps=config_file.read_bytes) as mock_read:
+            first = daemon._load_daemon_config()
+            second = daemon._load_daemon_config()
+            assert first == second == {"port": 9000}
+            mock_read.assert_called_once()
+
+    def test_round_trip(self, config_file):
+        """Test that a saved config loads back unchanged."""
+        with patch.object(daemon, "_ensure_dirs"):
+            daemon._save_daemon_config("127.0.0.1", 9000)
+        config = daemon._load_daemon_config()
+        assert config["host"] == "127.0.0.1"
+        assert config["port"] == 9000
+        assert isinstance(config["started_at"], float)
+
+    def test_cache_miss_on_mtime_change(self, config_file):
+        """Test that a changed mtime triggers a reload."""
+        config_file.write_text(json.dumps({"port": 9000}))
+        assert daemon._load_daemon_config() == {"port": 9000}
+        config_file.write_text(json.dumps({"port": 9001}))
+        mtime_ns = config_file.stat().st_mtime_ns + 1_000_000
+        os.utime(config_file, ns=(mtime_ns, mtime_ns))
+        assert daemon._load_daemon_config() == {"port": 9001}
+
+    def test_cache_miss_on_size_change_same_mtime(self, config_file):
+        """Test that a rewrite within the same mtime tick is still seen."""
+        config_file.write_text(json.dumps({"port": 9000}))
+        mtime_ns = config_file.stat().st_mtime_ns
+        assert daemon._load_daemon_config() == {"port": 9000}
+        config_file.write_text(json.dumps({"port": 9000, "pid": 1}))
+        os.utime(config_file, ns=(mtime_ns, mtime_ns))
+        assert daemon._load_daemon_config() == {"port": 9000, "pid": 1}
+
+    def test_returns_copy(self, config_file):
+        """Test that mutating a returned config doesn't touch the cache."""
+        config_file.write_text(json.dumps({"port": 9000}))
+        daemon._load_daemon_config()["port"] = 1
+        assert daemon._load_daemon_config() == {"port": 9000}
 
 
 class TestIsProcessRunning:
@@ -139,27 +244,168 @@ class TestIsProcessRunning:
         with patch("os.kill", side_effect=ProcessLookupError):
             assert daemon._is_process_running(12345) is False
 
+    def test_same_start_time(self):
+        """Test that a matching start time confirms the daemon is running."""
+        stat = b"12345 (python) S 1 12345 12345 0 -1 4194560 " + b"0 " * 12 + b"4242 0 0\n"
+        with patch("os.kill", return_value=None):
+            with patch("builtins.open", mock_open(read_data=stat)):
+                assert daemon._is_process_running(12345, 4242) is True
+
+    def test_pid_reused(self):
+        """Test that a live PID with a different start time is not the daemon."""
+        stat = b"12345 (some other) S 1 12345 12345 0 -1 4194560 " + b"0 " * 12 + b"9999 0 0\n"
+        with patch("os.kill", return_value=None):
+            with patch("builtins.open", mock_open(read_data=stat)):
+                assert daemon._is_process_running(12345, 4242) is False
+
+    def test_start_time_unavailable(self):
+        """Test falling back to PID liveness when /proc is unavailable."""
+        with patch("os.kill", return_value=None):
+            with patch("builtins.open", side_effect=FileNotFoundError):
+                assert daemon._is_process_running(12345, 4242) is True
+
+    def test_config_not_loaded(self):
+        """Test that probing a PID never reads the daemon config."""
+        with patch("os.kill", return_value=None):
+            with patch.object(daemon, "_load_daemon_config") as mock_load:
+                assert daemon._is_process_running(12345) is True
+        mock_load.assert_not_called()
+
+
+class TestWaitForExit:
+    """Tests for _wait_for_exit function."""
+
+    def test_pidfd_ready(self):
+        """Test that a readable pidfd reports the process as exited."""
+        with patch("os.pidfd_open", create=True, return_value=99):
+            with patch("select.poll") as mock_poll:
+                mock_poll.return_value.poll.return_value = [(99, 1)]
+                with patch("os.close") as mock_close:
+                    assert daemon._wait_for_exit(12345, 5.0) is True
+                    mock_poll.return_value.poll.assert_called_once_with(5000.0)
+                    mock_close.assert_called_once_with(99)
+
+    def test_pidfd_timeout(self):
+        """Test that a poll timeout reports the process as still running."""
+        with patch("os.pidfd_open", create=True, return_value=99):
+            with patch("select.poll") as mock_poll:
+                mock_poll.return_value.poll.return_value = []
+                with patch("os.close"):
+                    assert daemon._wait_for_exit(12345, 5.0) is False
+
+    def test_pidfd_process_gone(self):
+        """Test when the process has already exited."""
+        with patch("os.pidfd_open", create=True, side_effect=ProcessLookupError):
+            assert daemon._wait_for_exit(12345, 5.0) is True
+
+    def test_fallback_polling(self):
+        """Test polling fallback when pidfd_open is unsupported."""
+        with patch("os.pidfd_open", create=True, side_effect=OSError):
+            with patch.object(
+                daemon, "_is_process_running", side_effect=[True, False]
+            ) as mock_running:
+                with patch("time.sleep") as mock_sleep:
+                    assert daemon._wait_for_exit(12345, 5.0, 4242) is True
+                    mock_sleep.assert_called_once_with(0.1)
+        mock_running.assert_called_with(12345, 4242)
+
+
+class FakeSocket:
+    """Minimal stand-in for the socket.socket calls made by _is_port_in_use."""
+
+    __slots__ = ("bind_errno", "connect_result", "calls")
+
+    def __init__(self, bind_errno=None, connect_result=1):
+        self.bind_errno = bind_errno
+        self.connect_result = connect_result
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+    def setsockopt(self, *args):
+        pass
+
+    def settimeout(self, timeout):
+        pass
+
+    def bind(self, address):
+        self.calls.append(("bind", address))
+        if self.bind_errno is not None:
+            raise OSError(self.bind_errno, os.strerror(self.bind_errno))
+
+    def connect_ex(self, address):
+        self.calls.append(("connect_ex", address))
+        return self.connect_result
+
+
+@pytest.fixture
+def fake_socket(monkeypatch):
+    """Install a FakeSocket as socket.socket; call with FakeSocket's arguments."""
+
+    def install(**kwargs):
+        sock = FakeSocket(**kwargs)
+        monkeypatch.setattr(socket, "socket", lambda *args, **kw: sock)
+        return sock
+
+    return install
+
 
 class TestIsPortInUse:
     """Tests for _is_port_in_use function."""
 
-    def test_port_in_use(self):
+    def test_port_in_use(self, fake_socket):
         """Test when port is in use."""
-        mock_socket = MagicMock()
-        mock_socket.__enter__ = MagicMock(return_value=mock_socket)
-        mock_socket.__exit__ = MagicMock(return_value=None)
-        mock_socket.connect_ex.return_value = 0
-
-        with patch("socket.socket", return_value=mock_socket):
-            assert daemon._is_port_in_use(8080) is True
+        sock = fake_socket(bind_errno=errno.EADDRINUSE)
+        assert daemon._is_port_in_use(8080) is True
+        assert sock.calls == [("bind", ("0.0.0.0", 8080))]
 
-    def test_port_not_in_use(self):
+    def test_port_not_in_use(self, fake_socket):
         """Test when port is not in use."""
-        mock_socket = MagicMock()
-        mock_socket.connect_ex.return_value = 1
-
-        with patch("socket.socket", return_value=mock_socket):
-            assert daemon._is_port_in_use(8080) is False
+        fake_socket()
+        assert daemon._is_port_in_use(8080) is False
+
+    def test_port_in_use_firewalled(self, fake_socket, monkeypatch):
+        """Test that Linux detects a free port without any outbound connection."""
+        monkeypatch.setattr(daemon.sys, "platform", "linux")
+        sock = fake_socket(connect_result=None)
+        assert daemon._is_port_in_use(8080) is False
+        assert sock.calls == [("bind", ("0.0.0.0", 8080))]
+
+    def test_bind_inconclusive_falls_back_to_connect(self, fake_socket):
+        """Test connecting when the address cannot be bound locally."""
+        sock = fake_socket(bind_errno=errno.EADDRNOTAVAIL, connect_result=0)
+        assert daemon._is_port_in_use(8080, "10.0.0.1") is True
+        assert sock.calls[-1] == ("connect_ex", ("10.0.0.1", 8080))
+
+    def test_bind_success_confirmed_by_connect_outside_linux(self, fake_socket, monkeypatch):
+        """Test that a successful bind is double-checked by connecting on BSD/macOS."""
+        monkeypatch.setattr(daemon.sys, "platform", "darwin")
+        sock = fake_socket(connect_result=0)
+        assert daemon._is_port_in_use(8080) is True
+        assert sock.calls == [
+            ("bind", ("0.0.0.0", 8080)),
+            ("connect_ex", ("0.0.0.0", 8080)),
+        ]
+
+    def test_loopback_only_listener(self):
+        """Test that a listener on 127.0.0.1 counts for the default wildcard host."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(("127.0.0.1", 0))
+            listener.listen()
+            port = listener.getsockname()[1]
+            assert daemon._is_port_in_use(port) is True
+
+    def test_listening_socket(self):
+        """Test against a real listening socket."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(("127.0.0.1", 0))
+            listener.listen()
+            port = listener.getsockname()[1]
+            assert daemon._is_port_in_use(port, "127.0.0.1") is True
 
     def test_exception(self):
         """Test when socket operation raises exception."""
@@ -170,162 +416,194 @@ class TestIsPortInUse:
 class TestCleanupStalePidfile:
     """Tests for _cleanup_stale_pidfile function."""
 
-    def test_removes_stale_pid(self):
+    def test_removes_stale_pid(self, daemon_mocks):
         """Test removing stale PID file."""
-        with patch.object(daemon, "_read_pid", return_value=12345):
-            with patch.object(daemon, "_is_process_running", return_value=False):
-                with patch.object(daemon, "_remove_pid") as mock_remove_pid:
-                    with patch.object(daemon, "_remove_daemon_config") as mock_remove_config:
-                        daemon._cleanup_stale_pidfile()
-                        mock_remove_pid.assert_called_once()
-                        mock_remove_config.assert_called_once()
-
-    def test_keeps_valid_pid(self):
+        daemon_mocks._read_pid.return_value = 12345
+        daemon._cleanup_stale_pidfile()
+        daemon_mocks._remove_pid.assert_called_once()
+        daemon_mocks._remove_daemon_config.assert_called_once()
+
+    def test_keeps_valid_pid(self, daemon_mocks):
         """Test keeping valid PID file."""
-        with patch.object(daemon, "_read_pid", return_value=12345):
-            with patch.object(daemon, "_is_process_running", return_value=True):
-                with patch.object(daemon, "_remove_pid") as mock_remove_pid:
-                    daemon._cleanup_stale_pidfile()
-                    mock_remove_pid.assert_not_called()
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._is_process_running.return_value = True
+        daemon._cleanup_stale_pidfile()
+        daemon_mocks._remove_pid.assert_not_called()
 
-    def test_no_pid_file(self):
+    def test_no_pid_file(self, daemon_mocks):
         """Test when there's no PID file."""
-        with patch.object(daemon, "_read_pid", return_value=None):
-            with patch.object(daemon, "_remove_pid") as mock_remove_pid:
-                daemon._cleanup_stale_pidfile()
-                mock_remove_pid.assert_not_called()
+        daemon._cleanup_stale_pidfile()
+        daemon_mocks._remove_pid.assert_not_called()
 
 
 class TestGetStatus:
     """Tests for get_status function."""
 
-    def test_running(self):
+    def test_running(self, daemon_mocks):
         """Test getting status when running."""
         config = {"host": "127.0.0.1", "port": 9000}
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch.object(daemon, "_is_process_running", return_value=True):
-                    with patch.object(daemon, "_load_daemon_config", return_value=config):
-                        running, pid, loaded_config = daemon.get_status()
-                        assert running is True
-                        assert pid == 12345
-                        assert loaded_config == config
-
-    def test_not_running(self):
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._is_process_running.return_value = True
+        daemon_mocks._load_daemon_config.return_value = config
+        running, pid, loaded_config = daemon.get_status()
+        assert running is True
+        assert pid == 12345
+        assert loaded_config == config
+
+    def test_not_running(self, daemon_mocks):
         """Test getting status when not running."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                running, pid, config = daemon.get_status()
-                assert running is False
-                assert pid is None
-                assert config is None
+        running, pid, config = daemon.get_status()
+        assert running is False
+        assert pid is None
+        assert config is None
+
+    def test_stale_pidfile_removed(self, daemon_mocks):
+        """Test that a dead PID is cleaned up after a single pidfile read."""
+        daemon_mocks._read_pid.return_value = 12345
+        assert daemon.get_status() == (False, None, None)
+        daemon_mocks._read_pid.assert_called_once()
+        daemon_mocks._is_process_running.assert_called_once_with(12345, None)
+        daemon_mocks._remove_pid.assert_called_once()
+        daemon_mocks._remove_daemon_config.assert_called_once()
 
 
 class TestStopDaemon:
     """Tests for stop_daemon function."""
 
-    def test_stop_not_running(self):
+    def test_stop_not_running(self, daemon_mocks):
         """Test stopping when not running."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                result = daemon.stop_daemon()
-                assert result is True
+        result = daemon.stop_daemon()
+        assert result is True
 
-    def test_stop_gracefully(self):
+    def test_stop_gracefully(self, daemon_mocks):
         """Test graceful stop."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                # First check: running, then loop checks (49 times False to break), final check not running
-                with patch.object(daemon, "_is_process_running", side_effect=[True] + [False] * 50):
-                    with patch("os.kill", return_value=None) as mock_kill:
-                        with patch.object(daemon, "_remove_pid"):
-                            with patch.object(daemon, "_remove_daemon_config"):
-                                result = daemon.stop_daemon()
-                                assert result is True
-                                mock_kill.assert_called_with(12345, signal.SIGTERM)
-
-    def test_stop_force(self):
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._is_process_running.return_value = True
+        result = daemon.stop_daemon()
+        assert result is True
+        daemon_mocks.kill.assert_called_once_with(12345, signal.SIGTERM)
+        daemon_mocks._wait_for_exit.assert_called_once_with(12345, 5.0, None)
+
+    def test_stop_passes_start_time(self, daemon_mocks):
+        """Test that the saved start time is loaded once and reused while waiting."""
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._load_daemon_config.return_value = {"pid": 12345, "start_time": 4242}
+        daemon_mocks._is_process_running.return_value = True
+        assert daemon.stop_daemon() is True
+        daemon_mocks._is_process_running.assert_called_with(12345, 4242)
+        daemon_mocks._wait_for_exit.assert_called_once_with(12345, 5.0, 4242)
+
+    def test_stop_force(self, daemon_mocks):
         """Test force stop."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch.object(daemon, "_read_port", return_value=54321):
-                    with patch.object(daemon, "_is_process_running", return_value=False):
-                        with patch.object(daemon, "_is_port_in_use", return_value=False):
-                            with patch("os.kill") as mock_kill:
-                                with patch.object(daemon, "_remove_pid"):
-                                    with patch.object(daemon, "_remove_daemon_config"):
-                                        result = daemon.stop_daemon(force=True)
-                                        assert result is True
-                                        mock_kill.assert_called_once_with(12345, signal.SIGKILL)
-
-    def test_stop_process_lookup_error(self):
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._load_daemon_config.return_value = {"port": 54321}
+        result = daemon.stop_daemon(force=True)
+        assert result is True
+        daemon_mocks.kill.assert_called_once_with(12345, signal.SIGKILL)
+
+    def test_stop_process_lookup_error(self, daemon_mocks):
         """Test stop when process lookup fails."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch("os.kill", side_effect=ProcessLookupError):
-                    with patch.object(daemon, "_remove_pid"):
-                        with patch.object(daemon, "_remove_daemon_config"):
-                            result = daemon.stop_daemon()
-                            assert result is True
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks.kill.side_effect = ProcessLookupError
+        result = daemon.stop_daemon()
+        assert result is True
 
 
 class TestRestartDaemon:
     """Tests for restart_daemon function."""
 
-    def test_restart(self):
+    def test_restart(self, daemon_mocks):
         """Test restart daemon."""
-        with patch.object(daemon, "stop_daemon", return_value=True):
-            with patch("time.sleep"):
+        with patch.object(daemon, "stop_daemon", return_value=True) as mock_stop:
+            with patch("time.sleep") as mock_sleep:
                 with patch.object(daemon, "start_daemon", return_value=True) as mock_start:
                     result = daemon.restart_daemon("127.0.0.1", 9000, "info")
                     assert result is True
+                    mock_stop.assert_called_once_with(force=True)
                     mock_start.assert_called_once_with("127.0.0.1", 9000, "info")
+                    mock_sleep.assert_not_called()
+
+    def test_restart_not_running(self, daemon_mocks):
+        """Test restart when no daemon was running."""
+        with patch.object(daemon, "stop_daemon", return_value=True):
+            with patch.object(daemon, "start_daemon", return_value=True):
+                assert daemon.restart_daemon("127.0.0.1", 9000, "info") is True
+
+    def test_restart_stop_failed(self, daemon_mocks):
+        """Test that no new server is started when the old one can't be stopped."""
+        with patch.object(daemon, "stop_daemon", return_value=False):
+            with patch.object(daemon, "start_daemon") as mock_start:
+                assert daemon.restart_daemon("127.0.0.1", 9000, "info") is False
+                mock_start.assert_not_called()
 
 
 class TestShowLogs:
     """Tests for show_logs function."""
 
-    def test_no_log_file(self):
+    def test_no_log_file(self, tmp_path, capsys):
         """Test when log file doesn't exist."""
-        with patch.object(Path, "exists", return_value=False):
+        with patch.object(daemon, "LOG_FILE", tmp_path / "oa2a.log"):
             result = daemon.show_logs()
             assert result is False
+        assert "No log file found" in capsys.readouterr().err
+
+    def test_no_log_file_follow(self, tmp_path, capsys):
+        """Test follow mode when log file doesn't exist."""
+        with patch.object(daemon, "LOG_FILE", tmp_path / "oa2a.log"):
+            result = daemon.show_logs(follow=True)
+            assert result is False
+        assert "No log file found" in capsys.readouterr().err
 
-    def test_show_last_lines(self):
+    def test_show_last_lines(self, tmp_path, capsys):
         """Test showing last N lines."""
-        log_content = "line1\nline2\nline3\nline4\nline5\n"
-        with patch.object(Path, "exists", return_value=True):
-            with patch("builtins.open", mock_open(read_data=log_content)):
-                with patch("builtins.print"):
-                    result = daemon.show_logs(lines=2)
-                    assert result is True
+        log_file = tmp_path / "oa2a.log"
+        log_file.write_text("line1\nline2\nline3\nline4\nline5\n")
+        with patch.object(daemon, "LOG_FILE", log_file):
+            result = daemon.show_logs(lines=2)
+            assert result is True
+        assert capsys.readouterr().out == "line4\nline5\n"
+
+    def test_show_last_lines_spans_blocks(self, tmp_path, capsys):
+        """Test the backwards scan across several read blocks."""
+        log_file = tmp_path / "oa2a.log"
+        lines = [f"{i:06d} " + "x" * 100 + "\n" for i in range(2000)]
+        log_file.write_text("".join(lines))
+        with patch.object(daemon, "LOG_FILE", log_file):
+            with patch.object(daemon, "_TAIL_BLOCK_SIZE", 4096):
+                assert daemon.show_logs(lines=100) is True
+        assert capsys.readouterr().out == "".join(lines[-100:])
+
+    def test_show_more_lines_than_file(self, tmp_path, capsys):
+        """Test asking for more lines than the file holds."""
+        log_file = tmp_path / "oa2a.log"
+        log_file.write_text("line1\nline2")
+        with patch.object(daemon, "LOG_FILE", log_file):
+            assert daemon.show_logs(lines=50) is True
+        assert capsys.readouterr().out == "line1\nline2"
 
     def test_show_logs_exception(self):
         """Test handling exception when reading logs."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch("builtins.open", side_effect=IOError("Cannot read")):
-                result = daemon.show_logs()
-                assert result is False
+        with patch("builtins.open", side_effect=IOError("Cannot read")):
+            result = daemon.show_logs()
+            assert result is False
 
 
 class TestStartDaemon:
     """Tests for start_daemon function."""
 
-    def test_already_running(self):
+    def test_already_running(self, daemon_mocks):
         """Test starting when already running."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch.object(daemon, "_load_daemon_config", return_value={"port": 8080}):
-                    result = daemon.start_daemon()
-                    assert result is False
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._is_process_running.return_value = True
+        daemon_mocks._load_daemon_config.return_value = {"port": 8080}
+        result = daemon.start_daemon()
+        assert result is False
 
-    def test_port_in_use(self):
+    def test_port_in_use(self, daemon_mocks):
         """Test when port is already in use."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=True):
-                    result = daemon.start_daemon(port=8080)
-                    assert result is False
+        daemon_mocks._is_port_in_use.return_value = True
+        result = daemon.start_daemon(port=8080)
+        assert result is False
 
 
 if __name__ == "__main__":
@@ -2,7 +2,9 @@
 Advanced tests for daemon module covering subprocess and edge cases.
 """
 
+import errno
 import signal
+import socket
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch, mock_open
@@ -11,191 +13,238 @@ import pytest
 
 from local_openai2anthropic import daemon
 
+pytestmark = pytest.mark.usefixtures("daemon_state")
+
 
 class TestStartDaemonAdvanced:
     """Advanced tests for start_daemon function."""
 
-    def test_start_daemon_success(self):
-        """Test successful daemon start."""
+    @pytest.fixture
+    def popen(self, daemon_mocks, monkeypatch):
+        """Mock subprocess.Popen returning a live process that opens its port."""
         mock_process = MagicMock()
         mock_process.pid = 12345
         mock_process.poll = MagicMock(return_value=None)
+        mock_popen = MagicMock(return_value=mock_process)
+        monkeypatch.setattr("subprocess.Popen", mock_popen)
+        daemon_mocks._wait_for_port = MagicMock(return_value=True)
+        monkeypatch.setattr(daemon, "_wait_for_port", daemon_mocks._wait_for_port)
+        return mock_popen
 
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=False):
-                    with patch.object(daemon, "_ensure_dirs"):
-                        with patch("subprocess.Popen", return_value=mock_process):
-                            with patch("time.sleep"):
-                                with patch.object(daemon, "_save_daemon_config") as mock_save:
-                                    with patch.object(daemon, "_is_port_in_use", side_effect=[False, True]):
-                                        result = daemon.start_daemon("127.0.0.1", 8080, "info")
-                                        assert result is True
-                                        mock_save.assert_called_once()
-
-    def test_start_daemon_process_exits_immediately(self):
+    def test_start_daemon_success(self, daemon_mocks, popen):
+        """Test successful daemon start."""
+        result = daemon.start_daemon("127.0.0.1", 8080, "info")
+        assert result is True
+        daemon_mocks._wait_for_port.assert_called_once_with(8080, "127.0.0.1", 3.0, popen.return_value)
+        daemon_mocks._save_daemon_config.assert_called_once()
+
+    def test_start_daemon_process_exits_immediately(self, daemon_mocks, popen, monkeypatch):
         """Test when daemon process exits immediately."""
-        mock_process = MagicMock()
-        mock_process.poll = MagicMock(return_value=1)  # Process exited
-
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=False):
-                    with patch.object(daemon, "_ensure_dirs"):
-                        with patch("subprocess.Popen", return_value=mock_process):
-                            with patch("time.sleep"):
-                                with patch("builtins.open", mock_open()):
-                                    result = daemon.start_daemon()
-                                    assert result is False
-
-    def test_start_daemon_port_never_active(self):
-        """Test when port never becomes active and process dies."""
-        mock_process = MagicMock()
-        mock_process.pid = 12345
-        # First poll returns None (running), second poll returns exit code (died)
-        mock_process.poll = MagicMock(side_effect=[None, 1])
-
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=False):
-                    with patch.object(daemon, "_ensure_dirs"):
-                        with patch("subprocess.Popen", return_value=mock_process):
-                            with patch("time.sleep"):
-                                with patch("builtins.open", mock_open()):
-                                    result = daemon.start_daemon()
-                                    assert result is False
-
-    def test_start_daemon_exception(self):
+        popen.return_value.poll.return_value = 1  # Process exited
+        daemon_mocks._wait_for_port.return_value = False
+        monkeypatch.setattr("builtins.open", mock_open())
+        result = daemon.start_daemon()
+        assert result is False
+        daemon_mocks._save_daemon_config.assert_not_called()
+
+    def test_start_daemon_port_never_active(self, daemon_mocks, popen, monkeypatch):
+        """Test when port never becomes active but the process keeps running."""
+        daemon_mocks._wait_for_port.return_value = False
+        monkeypatch.setattr("builtins.open", mock_open())
+        result = daemon.start_daemon()
+        assert result is True
+        daemon_mocks._save_daemon_config.assert_called_once()
+
+    def test_start_daemon_exception(self, daemon_mocks, popen, monkeypatch):
         """Test exception handling during start - exception in subprocess.Popen."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=False):
-                    with patch.object(daemon, "_ensure_dirs"):
-                        # Patch subprocess.Popen to raise exception (inside try block)
-                        with patch("subprocess.Popen", side_effect=Exception("Failed to start")):
-                            with patch("builtins.open", mock_open()):
-                                result = daemon.start_daemon()
-                                assert result is False
-
-    def test_start_daemon_setsid_on_unix(self):
+        # Popen raising lands inside the try block
+        popen.side_effect = Exception("Failed to start")
+        monkeypatch.setattr("builtins.open", mock_open())
+        result = daemon.start_daemon()
+        assert result is False
+
+    def test_start_daemon_setsid_on_unix(self, daemon_mocks, popen, monkeypatch):
         """Test that setsid is used on Unix platforms."""
-        mock_process = MagicMock()
-        mock_process.pid = 12345
-        mock_process.poll = MagicMock(return_value=None)
+        monkeypatch.setattr(sys, "platform", "linux")
+        daemon.start_daemon("127.0.0.1", 8080, "info")
+        # Check that start_new_session was passed
+        call_kwargs = popen.call_args[1]
+        assert call_kwargs.get("start_new_session") is True
 
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=False):
-                    with patch.object(daemon, "_ensure_dirs"):
-                        with patch("subprocess.Popen", return_value=mock_process) as mock_popen:
-                            with patch("time.sleep"):
-                                with patch.object(daemon, "_save_daemon_config"):
-                                    with patch.object(daemon, "_is_port_in_use", side_effect=[False, True]):
-                                        with patch.object(sys, "platform", "linux"):
-                                            daemon.start_daemon("127.0.0.1", 8080, "info")
-                                            # Check that start_new_session was passed
-                                            call_kwargs = mock_popen.call_args[1]
-                                            assert call_kwargs.get("start_new_session") is True
-
-    def test_start_daemon_no_setsid_on_windows(self):
+    def test_start_daemon_no_setsid_on_windows(self, daemon_mocks, popen, monkeypatch):
         """Test that setsid is not used on Windows."""
-        mock_process = MagicMock()
-        mock_process.pid = 12345
-        mock_process.poll = MagicMock(return_value=None)
-
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=None):
-                with patch.object(daemon, "_is_port_in_use", return_value=False):
-                    with patch.object(daemon, "_ensure_dirs"):
-                        with patch("subprocess.Popen", return_value=mock_process) as mock_popen:
-                            with patch("time.sleep"):
-                                with patch.object(daemon, "_save_daemon_config"):
-                                    with patch.object(daemon, "_is_port_in_use", side_effect=[False, True]):
-                                        with patch.object(sys, "platform", "win32"):
-                                            daemon.start_daemon("127.0.0.1", 8080, "info")
-                                            # Check that start_new_session was not passed or is False
-                                            call_kwargs = mock_popen.call_args[1]
-                                            assert call_kwargs.get("start_new_session") is not True
+        monkeypatch.setattr(sys, "platform", "win32")
+        daemon.start_daemon("127.0.0.1", 8080, "info")
+        # Check that start_new_session was not passed or is False
+        call_kwargs = popen.call_args[1]
+        assert call_kwargs.get("start_new_session") is not True
+
+
+class TestWaitForPort:
+    """Tests for _wait_for_port function."""
+
+    @pytest.fixture
+    def listener(self):
+        """A socket listening on a free loopback port."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            s.listen()
+            yield s
+
+    @pytest.fixture
+    def closed_port(self):
+        """A loopback port with nothing listening on it."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    def test_port_accepting(self, listener):
+        """Test returning as soon as the port accepts connections."""
+        process = MagicMock()
+        port = listener.getsockname()[1]
+        assert daemon._wait_for_port(port, "127.0.0.1", 5.0, process) is True
+        process.poll.assert_not_called()
+
+    def test_selector_ready(self, closed_port):
+        """Test that a pending connect completes through the selector."""
+        process = MagicMock()
+        with patch("socket.socket.connect_ex", return_value=errno.EINPROGRESS):
+            with patch("selectors.DefaultSelector.select", return_value=[(MagicMock(), 0)]) as mock_select:
+                with patch("socket.socket.getsockopt", return_value=0):
+                    assert daemon._wait_for_port(closed_port, "127.0.0.1", 5.0, process) is True
+                    mock_select.assert_called_once()
+
+    def test_process_exits(self, closed_port):
+        """Test giving up when the process exits."""
+        process = MagicMock()
+        process.poll.return_value = 1
+        assert daemon._wait_for_port(closed_port, "127.0.0.1", 5.0, process) is False
+        process.poll.assert_called_once()
+
+    def test_timeout(self, closed_port):
+        """Test giving up after the timeout while the process is alive."""
+        process = MagicMock()
+        process.poll.return_value = None
+        assert daemon._wait_for_port(closed_port, "127.0.0.1", 0.1, process) is False
 
 
 class TestStopDaemonAdvanced:
     """Advanced tests for stop_daemon function."""
 
-    def test_stop_daemon_force_kill_after_timeout(self):
+    def test_stop_daemon_force_kill_after_timeout(self, daemon_mocks):
         """Test force kill when graceful stop times out."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                # Process keeps running
-                with patch.object(daemon, "_is_process_running", return_value=True):
-                    with patch("os.kill") as mock_kill:
-                        with patch.object(daemon, "_remove_pid"):
-                            with patch.object(daemon, "_remove_daemon_config"):
-                                result = daemon.stop_daemon(force=True)
-                                assert result is True
-                                # Should be called with SIGKILL
-                                mock_kill.assert_called_with(12345, signal.SIGKILL)
-
-    def test_stop_daemon_force_flag_immediate(self):
+        daemon_mocks._read_pid.return_value = 12345
+        # Process keeps running, wait times out
+        daemon_mocks._is_process_running.return_value = True
+        daemon_mocks._wait_for_exit.return_value = False
+        result = daemon.stop_daemon(force=True)
+        assert result is True
+        # Should be called with SIGKILL
+        daemon_mocks.kill.assert_called_with(12345, signal.SIGKILL)
+
+    def test_stop_daemon_force_flag_immediate(self, daemon_mocks):
         """Test immediate SIGKILL with force flag."""
-        # Test that force=True uses SIGKILL - simplified test
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch.object(daemon, "_read_port", return_value=None):
-                    # First call returns True (process running), second returns False (exits loop)
-                    # Third call returns False (final check)
-                    with patch.object(daemon, "_is_process_running", side_effect=[True, False, False]):
-                        with patch("os.kill") as mock_kill:
-                            with patch.object(daemon, "_remove_pid"):
-                                with patch.object(daemon, "_remove_daemon_config"):
-                                    result = daemon.stop_daemon(force=True)
-                                    assert result is True
-                                    # Verify SIGKILL was used (not SIGTERM)
-                                    calls = mock_kill.call_args_list
-                                    assert len(calls) >= 1
-                                    assert calls[0][0][1] == signal.SIGKILL
-
-    def test_stop_daemon_oserror(self):
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._is_process_running.return_value = True
+        result = daemon.stop_daemon(force=True)
+        assert result is True
+        # Verify SIGKILL was used (not SIGTERM)
+        calls = daemon_mocks.kill.call_args_list
+        assert len(calls) >= 1
+        assert calls[0][0][1] == signal.SIGKILL
+
+    def test_stop_daemon_oserror(self, daemon_mocks):
         """Test stop_daemon with OSError."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch("os.kill", side_effect=OSError("Permission denied")):
-                    with patch.object(daemon, "_remove_pid"):
-                        with patch.object(daemon, "_remove_daemon_config"):
-                            result = daemon.stop_daemon()
-                            assert result is True
-
-    def test_stop_daemon_generic_exception(self):
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks.kill.side_effect = OSError("Permission denied")
+        result = daemon.stop_daemon()
+        assert result is True
+
+    def test_stop_daemon_generic_exception(self, daemon_mocks):
         """Test stop_daemon with generic exception."""
-        with patch.object(daemon, "_cleanup_stale_pidfile"):
-            with patch.object(daemon, "_read_pid", return_value=12345):
-                with patch.object(daemon, "_read_port", return_value=None):
-                    with patch.object(daemon, "_is_process_running", return_value=True):
-                        with patch("os.kill", side_effect=Exception("Unexpected")):
-                            result = daemon.stop_daemon()
-                            assert result is False
+        daemon_mocks._read_pid.return_value = 12345
+        daemon_mocks._is_process_running.return_value = True
+        daemon_mocks.kill.side_effect = Exception("Unexpected")
+        result = daemon.stop_daemon()
+        assert result is False
 
 
 class TestShowLogsAdvanced:
     """Advanced tests for show_logs function."""
 
-    def test_show_logs_follow_mode(self):
-        """Test show_logs with follow mode."""
-        with patch.object(Path, "exists", return_value=True):
+    @pytest.fixture
+    def log_file(self, tmp_path):
+        """Point LOG_FILE at a temporary log with 60 lines."""
+        path = tmp_path / "oa2a.log"
+        path.write_text("".join(f"line{i}\n" for i in range(60)))
+        with patch.object(daemon, "LOG_FILE", path):
+            yield path
+
+    def test_show_logs_follow_mode(self, log_file, capsys):
+        """Test show_logs with follow mode streams appended output."""
+        appends = iter(["line60\n"])
+
+        def wait():
+            try:
+                with open(log_file, "a") as f:
+                    f.write(next(appends))
+            except StopIteration:
+                raise KeyboardInterrupt
+
+        with patch.object(daemon, "_watch_for_writes") as mock_watch:
+            mock_watch.return_value.__enter__.return_value = wait
             with patch("subprocess.run") as mock_run:
                 result = daemon.show_logs(follow=True, lines=50)
                 assert result is True
-                mock_run.assert_called_once()
-                # Check that tail -f was called
-                call_args = mock_run.call_args[0][0]
-                assert "tail" in call_args
-                assert "-f" in call_args
+                mock_run.assert_not_called()
+
+        out = capsys.readouterr().out
+        assert out == "".join(f"line{i}\n" for i in range(10, 61))
 
-    def test_show_logs_follow_keyboard_interrupt(self):
+    def test_show_logs_follow_keyboard_interrupt(self, log_file):
         """Test show_logs follow mode with keyboard interrupt."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch("subprocess.run", side_effect=KeyboardInterrupt):
-                result = daemon.show_logs(follow=True)
-                assert result is True  # Should return True after interrupt
+        with patch.object(daemon, "_tail_follow", side_effect=KeyboardInterrupt):
+            result = daemon.show_logs(follow=True)
+            assert result is True  # Should return True after interrupt
+
+    def _follow(self, log_file, *steps):
+        """Run show_logs in follow mode, running one step per wait() call."""
+        steps = iter(steps)
+
+        def wait():
+            try:
+                next(steps)()
+            except StopIteration:
+                raise KeyboardInterrupt
+
+        with patch.object(daemon, "_watch_for_writes") as mock_watch:
+            mock_watch.return_value.__enter__.return_value = wait
+            assert daemon.show_logs(follow=True, lines=2) is True
+
+    def test_show_logs_follow_truncated(self, log_file, capsys):
+        """Test that follow mode starts over after the log is truncated."""
+        self._follow(log_file, lambda: log_file.write_text("fresh\n"))
+        captured = capsys.readouterr()
+        assert captured.out == "line58\nline59\nfresh\n"
+        assert "truncated" in captured.err
+
+    def test_show_logs_follow_replaced(self, log_file, capsys):
+        """Test that follow mode switches to a recreated log file."""
+
+        def rotate():
+            log_file.rename(log_file.with_name("oa2a.log.1"))
+            log_file.write_text("rotated\n")
+
+        self._follow(log_file, rotate)
+        assert capsys.readouterr().out == "line58\nline59\nrotated\n"
+
+    def test_watch_for_writes_fallback(self, log_file):
+        """Test polling fallback on platforms without kqueue."""
+        with patch.object(daemon, "select", MagicMock(spec=[])):
+            with patch("time.sleep") as mock_sleep:
+                with daemon._watch_for_writes(log_file) as wait:
+                    wait()
+                mock_sleep.assert_called_once_with(0.2)
 
 
 class TestRunForeground:
@@ -209,11 +258,14 @@ class TestRunForeground:
         mock_app = MagicMock()
 
         with patch.dict("os.environ", {}, clear=True):
-            with patch("local_openai2anthropic.main.create_app", return_value=mock_app):
-                with patch("local_openai2anthropic.config.get_settings", return_value=mock_settings):
+            with patch("local_openai2anthropic.main.create_app", return_value=mock_app) as mock_create_app:
+                with patch("local_openai2anthropic.config.get_settings", return_value=mock_settings) as mock_get_settings:
                     with patch("uvicorn.run") as mock_uvicorn:
                         daemon.run_foreground("127.0.0.1", 8080, "info")
                         mock_uvicorn.assert_called_once()
+                        # Settings are loaded once and handed to create_app
+                        mock_get_settings.assert_called_once_with()
+                        mock_create_app.assert_called_once_with(mock_settings)
                         # Check environment variables were set
                         assert "127.0.0.1" == daemon.os.environ.get("OA2A_HOST")
                         assert "8080" == daemon.os.environ.get("OA2A_PORT")
@@ -222,26 +274,25 @@ class TestRunForeground:
 class TestRemoveDaemonConfig:
     """Tests for _remove_daemon_config function."""
 
-    def test_remove_existing_config(self):
+    def test_remove_existing_config(self, tmp_path):
         """Test removing existing config file."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "unlink") as mock_unlink:
-                daemon._remove_daemon_config()
-                mock_unlink.assert_called_once()
+        config_file = tmp_path / "oa2a.json"
+        config_file.write_text("{}")
+        with patch.object(daemon, "CONFIG_FILE", config_file):
+            daemon._remove_daemon_config()
+        assert not config_file.exists()
 
-    def test_remove_missing_config(self):
+    def test_remove_missing_config(self, tmp_path):
         """Test removing non-existent config file."""
-        with patch.object(Path, "exists", return_value=False):
-            with patch.object(Path, "unlink") as mock_unlink:
-                daemon._remove_daemon_config()
-                mock_unlink.assert_not_called()
+        with patch.object(daemon, "CONFIG_FILE", tmp_path / "oa2a.json"):
+            # Should not raise
+            daemon._remove_daemon_config()
 
     def test_remove_config_oserror(self):
         """Test handling OSError when removing config."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "unlink", side_effect=OSError):
-                # Should not raise
-                daemon._remove_daemon_config()
+        with patch.object(Path, "unlink", side_effect=OSError):
+            # Should not raise
+            daemon._remove_daemon_config()
 
 
 class TestSaveDaemonConfigEdgeCases:
@@ -250,7 +301,7 @@ class TestSaveDaemonConfigEdgeCases:
     def test_save_config_oserror(self):
         """Test handling OSError when saving config."""
         with patch.object(daemon, "_ensure_dirs"):
-            with patch.object(Path, "write_text", side_effect=OSError):
+            with patch.object(daemon, "_write_atomic", side_effect=OSError):
                 # Should not raise
                 daemon._save_daemon_config("127.0.0.1", 8080)
 
@@ -258,10 +309,12 @@ class TestSaveDaemonConfigEdgeCases:
 class TestLoadDaemonConfigEdgeCases:
     """Edge case tests for _load_daemon_config."""
 
-    def test_load_config_oserror(self):
+    def test_load_config_oserror(self, tmp_path):
         """Test handling OSError when loading config."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "read_text", side_effect=OSError):
+        config_file = tmp_path / "oa2a.json"
+        config_file.write_text("{}")
+        with patch.object(daemon, "CONFIG_FILE", config_file):
+            with patch.object(Path, "read_bytes", side_effect=OSError):
                 result = daemon._load_daemon_config()
                 assert result is None
 
@@ -271,10 +324,9 @@ class TestRemovePidEdgeCases:
 
     def test_remove_pid_oserror(self):
         """Test handling OSError when removing PID."""
-        with patch.object(Path, "exists", return_value=True):
-            with patch.object(Path, "unlink", side_effect=OSError):
-                # Should not raise
-                daemon._remove_pid()
+        with patch.object(Path, "unlink", side_effect=OSError):
+            # Should not raise
+            daemon._remove_pid()
 
 
 class TestEnsureDirsEdgeCases:
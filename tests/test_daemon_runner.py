@@ -5,6 +5,7 @@ Tests for the daemon_runner module.
 import signal
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -93,48 +94,55 @@ class TestSignalHandler:
                 mock_remove.assert_called_once()
 
 
+@pytest.fixture(scope="module")
+def mock_settings():
+    """Settings for a server with an API key, shared read-only by the module."""
+    settings = MagicMock()
+    settings.openai_api_key = "test-key"
+    settings.host = "127.0.0.1"
+    settings.port = 9000
+    settings.log_level = "INFO"
+    settings.openai_base_url = "https://api.openai.com"
+    return settings
+
+
 class TestRunServer:
     """Tests for run_server function."""
 
+    @pytest.fixture(autouse=True)
+    def runner_patches(self, monkeypatch):
+        """Stub out the process-wide side effects of run_server."""
+        patches = SimpleNamespace(atexit_register=MagicMock(), signal=MagicMock())
+        monkeypatch.setattr("os.getpid", lambda: 12345)
+        monkeypatch.setattr(daemon_runner, "_write_pid", lambda pid: None)
+        monkeypatch.setattr(daemon_runner, "log_message", lambda msg: None)
+        monkeypatch.setattr("atexit.register", patches.atexit_register)
+        monkeypatch.setattr("signal.signal", patches.signal)
+        return patches
+
     @patch("local_openai2anthropic.config.get_settings")
     def test_missing_api_key(self, mock_get_settings):
         """Test server exits when API key is missing."""
-        mock_settings = MagicMock()
-        mock_settings.openai_api_key = None
-        mock_get_settings.return_value = mock_settings
+        settings = MagicMock()
+        settings.openai_api_key = None
+        mock_get_settings.return_value = settings
 
-        with patch("os.getpid", return_value=12345):
-            with patch.object(daemon_runner, "_write_pid"):
-                with patch("atexit.register"):
-                    with patch("signal.signal"):
-                        with patch.object(daemon_runner, "log_message"):
-                            with pytest.raises(SystemExit) as exc_info:
-                                daemon_runner.run_server()
+        with pytest.raises(SystemExit) as exc_info:
+            daemon_runner.run_server()
 
-                            assert exc_info.value.code == 1
+        assert exc_info.value.code == 1
 
     @patch("uvicorn.run")
     @patch("local_openai2anthropic.config.get_settings")
     @patch("local_openai2anthropic.main.create_app")
-    def test_run_server_success(self, mock_create_app, mock_get_settings, mock_uvicorn_run):
+    def test_run_server_success(self, mock_create_app, mock_get_settings, mock_uvicorn_run, mock_settings):
         """Test successful server startup."""
-        mock_settings = MagicMock()
-        mock_settings.openai_api_key = "test-key"
-        mock_settings.host = "127.0.0.1"
-        mock_settings.port = 9000
-        mock_settings.log_level = "INFO"
-        mock_settings.openai_base_url = "https://api.openai.com"
         mock_get_settings.return_value = mock_settings
 
         mock_app = MagicMock()
         mock_create_app.return_value = mock_app
 
-        with patch("os.getpid", return_value=12345):
-            with patch.object(daemon_runner, "_write_pid"):
-                with patch("atexit.register"):
-                    with patch("signal.signal"):
-                        with patch.object(daemon_runner, "log_message"):
-                            daemon_runner.run_server()
+        daemon_runner.run_server()
 
         mock_create_app.assert_called_once_with(mock_settings)
         mock_uvicorn_run.assert_called_once()
@@ -148,72 +156,40 @@ class TestRunServer:
         """Test handling exception during server startup."""
         mock_get_settings.side_effect = Exception("Config error")
 
-        with patch("os.getpid", return_value=12345):
-            with patch.object(daemon_runner, "_write_pid"):
-                with patch("atexit.register"):
-                    with patch("signal.signal"):
-                        with patch.object(daemon_runner, "log_message"):
-                            with pytest.raises(SystemExit) as exc_info:
-                                daemon_runner.run_server()
+        with pytest.raises(SystemExit) as exc_info:
+            daemon_runner.run_server()
 
-                            assert exc_info.value.code == 1
+        assert exc_info.value.code == 1
 
     @patch("local_openai2anthropic.config.get_settings")
     @patch("local_openai2anthropic.main.create_app")
     @patch("uvicorn.run")
-    def test_signal_handlers_registered(self, mock_uvicorn_run, mock_create_app, mock_get_settings):
+    def test_signal_handlers_registered(
+        self, mock_uvicorn_run, mock_create_app, mock_get_settings, mock_settings, runner_patches
+    ):
         """Test that signal handlers are registered."""
-        mock_settings = MagicMock()
-        mock_settings.openai_api_key = "test-key"
-        mock_settings.host = "127.0.0.1"
-        mock_settings.port = 9000
-        mock_settings.log_level = "INFO"
-        mock_settings.openai_base_url = "https://api.openai.com"
         mock_get_settings.return_value = mock_settings
 
-        signal_calls = []
-
-        def mock_signal(signum, handler):
-            signal_calls.append((signum, handler))
-
-        with patch("os.getpid", return_value=12345):
-            with patch.object(daemon_runner, "_write_pid"):
-                with patch("atexit.register"):
-                    with patch("signal.signal", side_effect=mock_signal):
-                        with patch.object(daemon_runner, "log_message"):
-                            daemon_runner.run_server()
+        daemon_runner.run_server()
 
         # Check that signal handlers were registered
-        signums = [call[0] for call in signal_calls]
+        signums = [call.args[0] for call in runner_patches.signal.call_args_list]
         assert signal.SIGTERM in signums
         assert signal.SIGINT in signums
 
     @patch("local_openai2anthropic.config.get_settings")
     @patch("local_openai2anthropic.main.create_app")
     @patch("uvicorn.run")
-    def test_atexit_registered(self, mock_uvicorn_run, mock_create_app, mock_get_settings):
+    def test_atexit_registered(
+        self, mock_uvicorn_run, mock_create_app, mock_get_settings, mock_settings, runner_patches
+    ):
         """Test that atexit handler is registered."""
-        mock_settings = MagicMock()
-        mock_settings.openai_api_key = "test-key"
-        mock_settings.host = "127.0.0.1"
-        mock_settings.port = 9000
-        mock_settings.log_level = "INFO"
-        mock_settings.openai_base_url = "https://api.openai.com"
         mock_get_settings.return_value = mock_settings
 
-        registered_funcs = []
-
-        def mock_atexit_register(func):
-            registered_funcs.append(func)
-
-        with patch("os.getpid", return_value=12345):
-            with patch.object(daemon_runner, "_write_pid"):
-                with patch("atexit.register", side_effect=mock_atexit_register):
-                    with patch("signal.signal"):
-                        with patch.object(daemon_runner, "log_message"):
-                            daemon_runner.run_server()
+        daemon_runner.run_server()
 
         # Check that _remove_pid was registered
+        registered_funcs = [call.args[0] for call in runner_patches.atexit_register.call_args_list]
         assert daemon_runner._remove_pid in registered_funcs
 
 